@@ -1,25 +1,53 @@
-from fastapi import APIRouter, Form
+from fastapi import APIRouter, Form, Header
 from typing import List
+from app.config import JOB_DEFAULT_PRIORITY, JOB_MIN_CLIENT_PRIORITY, JOB_MAX_PRIORITY
 from app.services.grant_generator_service import generate_top_grants
+from app.services.job_queue import register_job_handler
+from app.services.single_flight import run_idempotent
 from app.schemas.grant_fetch import GrantOpportunity, GrantResponse
-from app.data.org_store import get_organization_analysis, save_organization_analysis
+from app.schemas.job import JobStatusResponse
+from app.api.v1.endpoints.jobs import accept_job
+from app.data.org_store import get_organization_analysis, save_session_reference, save_grant_options, InvalidSessionError
 import uuid
 
 router = APIRouter(prefix="/grant", tags=["Grant Generator"])
 
 
-@router.post("/generate", response_model=GrantResponse)
-async def generate_grants_endpoint(session_id: str = Form(...)):
+async def generate_and_store_grants(session_id: str) -> dict:
     grants = await generate_top_grants(session_id=session_id, top_n=3)
 
     # Store grants temporarily inside org session
-    org_data = get_organization_analysis(session_id)
-    if not org_data:
-        raise ValueError("Invalid org session")
-    org_data["grant_options"] = grants  # each grant now has grant_id
+    save_grant_options(session_id, grants)  # each grant now has grant_id
 
     return GrantResponse(
         grants=[GrantOpportunity(**g) for g in grants]
+    ).dict()
+
+
+register_job_handler("grant.generate", generate_and_store_grants)
+
+
+@router.post(
+    "/generate",
+    response_model=GrantResponse,
+    responses={202: {"model": JobStatusResponse}}
+)
+async def generate_grants_endpoint(
+    session_id: str = Form(...),
+    background: bool = Form(False),                # True: return a job id, poll /jobs/{job_id}
+    priority: int = Form(JOB_DEFAULT_PRIORITY, ge=JOB_MIN_CLIENT_PRIORITY, le=JOB_MAX_PRIORITY),
+    idempotency_key: str | None = Header(None, alias="Idempotency-Key")
+):
+    inputs = {"session_id": session_id}
+
+    if background:
+        return await accept_job("grant.generate", inputs, priority, idempotency_key)
+
+    return await run_idempotent(
+        "grant.generate",
+        idempotency_key,
+        inputs,
+        lambda: generate_and_store_grants(session_id)
     )
 
 
@@ -58,7 +86,7 @@ def select_grant(
 ):
     org_data = get_organization_analysis(org_session_id)
     if not org_data:
-        raise ValueError("Invalid org session")
+        raise InvalidSessionError("Invalid org session")
 
     selected_grant = next(
         (g for g in org_data.get("grant_options", []) if g["grant_id"] == grant_id),
@@ -71,13 +99,11 @@ def select_grant(
     # 🔹 Save a new session combining org + selected grant
     new_session_id = str(uuid.uuid4())
 
-    save_organization_analysis(
+    save_session_reference(
         new_session_id,
+        parent_key=org_session_id,
         payload={"source": "SELECTED_GRANT"},
-        analysis={
-            "organization": org_data,
-            "grant": selected_grant
-        }
+        delta={"grant": selected_grant}
     )
 
     return {"session_id": new_session_id}
@@ -1,23 +1,49 @@
-from fastapi import APIRouter, UploadFile, Form, File
+from fastapi import APIRouter, UploadFile, Form, File, Header
+from app.config import JOB_DEFAULT_PRIORITY, JOB_MIN_CLIENT_PRIORITY, JOB_MAX_PRIORITY
 from app.schemas.grant_opportunity import GrantOpportunityInput,  GrantOpportunityAnalyzeResponse
+from app.schemas.job import JobStatusResponse
 from app.services.grant_opportunity_service import analyze_grant_opportunity
+from app.services.job_queue import register_job_handler
+from app.services.single_flight import run_idempotent
+from app.services.upload_spool import spool_upload
+from app.api.v1.endpoints.jobs import accept_job
 
 router = APIRouter(prefix="/grant", tags=["Grant Opportunity"])
 
-@router.post("/analyze", response_model=GrantOpportunityAnalyzeResponse)
+register_job_handler("grant.analyze", analyze_grant_opportunity)
+
+@router.post(
+    "/analyze",
+    response_model=GrantOpportunityAnalyzeResponse,
+    responses={202: {"model": JobStatusResponse}}
+)
 async def analyze_grant_opportunity_endpoint(
     session_id: str = Form(...),
     rfp_file: UploadFile | None = File(None),
     opportunity_url: str | None = Form(None),
-    opportunity_text: str | None = Form(None)
+    opportunity_text: str | None = Form(None),
+    background: bool = Form(False),                # True: return a job id, poll /jobs/{job_id}
+    priority: int = Form(JOB_DEFAULT_PRIORITY, ge=JOB_MIN_CLIENT_PRIORITY, le=JOB_MAX_PRIORITY),
+    idempotency_key: str | None = Header(None, alias="Idempotency-Key")
 ):
+    # Streamed to disk in chunks; background jobs read the spooled file later
+    rfp = await spool_upload(rfp_file) if rfp_file else None
+
     input_data = GrantOpportunityInput(
-        rfp_file=await rfp_file.read() if rfp_file else None,
+        rfp_file_path=rfp["path"] if rfp else None,
+        rfp_file_sha256=rfp["sha256"] if rfp else None,
         opportunity_url=opportunity_url,
         opportunity_text=opportunity_text
     )
 
-    return analyze_grant_opportunity(
-        input_data=input_data,
-        session_id=session_id
+    inputs = {"input_data": input_data, "session_id": session_id}
+
+    if background:
+        return await accept_job("grant.analyze", inputs, priority, idempotency_key)
+
+    return await run_idempotent(
+        "grant.analyze",
+        idempotency_key,
+        inputs,
+        lambda: analyze_grant_opportunity(**inputs)
     )
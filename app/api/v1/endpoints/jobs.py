@@ -0,0 +1,52 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse
+from fastapi.encoders import jsonable_encoder
+from app.schemas.job import JobStatusResponse, JobResultResponse
+from app.services.job_queue import get_job, submit_job, JobQueueFullError
+from app.services.single_flight import run_idempotent
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+
+async def accept_job(operation: str, kwargs: dict, priority: int, idempotency_key: str = None) -> JSONResponse:
+    """
+    Queue a job for an endpoint running in background mode (202 + job record).
+    Retries with the same Idempotency-Key get the original job back.
+    """
+    async def _submit():
+        return submit_job(operation, kwargs, priority=priority)
+
+    try:
+        record = await run_idempotent(f"job:{operation}", idempotency_key, kwargs, _submit)
+    except JobQueueFullError as exc:
+        raise HTTPException(status_code=503, detail=str(exc))
+
+    return JSONResponse(
+        status_code=202,
+        content=jsonable_encoder(JobStatusResponse(**record))
+    )
+
+
+def _load_job(job_id: str) -> dict:
+    record = get_job(job_id)
+    if not record:
+        raise HTTPException(status_code=404, detail="Unknown or expired job_id")
+    return record
+
+
+@router.get("/{job_id}", response_model=JobStatusResponse)
+def get_job_status(job_id: str):
+    return _load_job(job_id)
+
+
+@router.get("/{job_id}/result", response_model=JobResultResponse)
+def get_job_result(job_id: str):
+    record = _load_job(job_id)
+
+    # Not finished yet: keep polling
+    if record["status"] in ("queued", "running"):
+        return JSONResponse(
+            status_code=202,
+            content=jsonable_encoder(JobStatusResponse(**record))
+        )
+    return record
@@ -1,9 +1,41 @@
-from fastapi import APIRouter, Form
+from fastapi import APIRouter, Form, Header
+from app.config import JOB_DEFAULT_PRIORITY, JOB_MIN_CLIENT_PRIORITY, JOB_MAX_PRIORITY
 from app.schemas.loi import LOIResponse
-from app.services.loi_service import generate_loi
+from app.schemas.job import JobStatusResponse
+from app.services.loi_service import generate_loi, stream_loi
+from app.services.job_queue import register_job_handler
+from app.services.single_flight import run_idempotent
+from app.api.v1.endpoints.jobs import accept_job
+from app.utils.sse import sse_response
 
 router = APIRouter(prefix="/loi", tags=["LOI"])
 
-@router.post("/generate", response_model=LOIResponse)
-def generate_loi_endpoint(session_id: str = Form(...)):
-    return generate_loi(session_id)
+register_job_handler("loi.generate", generate_loi)
+
+@router.post(
+    "/generate",
+    response_model=LOIResponse,
+    responses={202: {"model": JobStatusResponse}}
+)
+async def generate_loi_endpoint(
+    session_id: str = Form(...),
+    background: bool = Form(False),                # True: return a job id, poll /jobs/{job_id}
+    priority: int = Form(JOB_DEFAULT_PRIORITY, ge=JOB_MIN_CLIENT_PRIORITY, le=JOB_MAX_PRIORITY),
+    idempotency_key: str | None = Header(None, alias="Idempotency-Key")
+):
+    inputs = {"session_id": session_id}
+
+    if background:
+        return await accept_job("loi.generate", inputs, priority, idempotency_key)
+
+    return await run_idempotent(
+        "loi.generate",
+        idempotency_key,
+        inputs,
+        lambda: generate_loi(session_id)
+    )
+
+# Server-sent events: one "section" event per completed field, then "done"
+@router.post("/generate/stream")
+async def stream_loi_endpoint(session_id: str = Form(...)):
+    return sse_response(stream_loi(session_id))
@@ -1,4 +1,4 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Header
 from app.schemas.onboarding import (
     AnalyzeRequestWithWebsite,
     AnalyzeRequestWithoutWebsite,
@@ -8,15 +8,32 @@ from app.services.grant_readiness_service import (
     analyze_with_website,
     analyze_without_website
 )
+from app.services.single_flight import run_idempotent
 
 router = APIRouter(prefix="/onboarding", tags=["Onboarding"])
 
 
 @router.post("/analyze/with-website", response_model=GrantAnalysisResult)
-def analyze_with_website_endpoint(payload: AnalyzeRequestWithWebsite):
-    return analyze_with_website(payload)
+async def analyze_with_website_endpoint(
+    payload: AnalyzeRequestWithWebsite,
+    idempotency_key: str | None = Header(None, alias="Idempotency-Key")
+):
+    return await run_idempotent(
+        "onboarding.with_website",
+        idempotency_key,
+        {"payload": payload},
+        lambda: analyze_with_website(payload)
+    )
 
 
 @router.post("/analyze/without-website", response_model=GrantAnalysisResult)
-def analyze_without_website_endpoint(payload: AnalyzeRequestWithoutWebsite):
-    return analyze_without_website(payload)
+async def analyze_without_website_endpoint(
+    payload: AnalyzeRequestWithoutWebsite,
+    idempotency_key: str | None = Header(None, alias="Idempotency-Key")
+):
+    return await run_idempotent(
+        "onboarding.without_website",
+        idempotency_key,
+        {"payload": payload},
+        lambda: analyze_without_website(payload)
+    )
@@ -1,9 +1,44 @@
-from fastapi import APIRouter, Form
+from typing import Literal
+from fastapi import APIRouter, Form, Header
+from app.config import JOB_DEFAULT_PRIORITY, JOB_MIN_CLIENT_PRIORITY, JOB_MAX_PRIORITY
 from app.schemas.proposal import ProposalResponse
-from app.services.proposal_service import generate_proposal
+from app.schemas.job import JobStatusResponse
+from app.services.proposal_service import generate_proposal, stream_proposal
+from app.services.job_queue import register_job_handler
+from app.services.single_flight import run_idempotent
+from app.api.v1.endpoints.jobs import accept_job
+from app.utils.sse import sse_response
 
 router = APIRouter(prefix="/proposal", tags=["Proposal"])
 
-@router.post("/generate", response_model=ProposalResponse)
-def generate_proposal_endpoint(session_id: str = Form(...)):
-    return generate_proposal(session_id)
+register_job_handler("proposal.generate", generate_proposal)
+
+@router.post(
+    "/generate",
+    response_model=ProposalResponse,
+    responses={202: {"model": JobStatusResponse}}
+)
+async def generate_proposal_endpoint(
+    session_id: str = Form(...),
+    mode: Literal["single", "sections"] | None = Form(None),
+    consistency_pass: bool | None = Form(None),
+    background: bool = Form(False),                # True: return a job id, poll /jobs/{job_id}
+    priority: int = Form(JOB_DEFAULT_PRIORITY, ge=JOB_MIN_CLIENT_PRIORITY, le=JOB_MAX_PRIORITY),
+    idempotency_key: str | None = Header(None, alias="Idempotency-Key")
+):
+    inputs = {"session_id": session_id, "mode": mode, "consistency_pass": consistency_pass}
+
+    if background:
+        return await accept_job("proposal.generate", inputs, priority, idempotency_key)
+
+    return await run_idempotent(
+        "proposal.generate",
+        idempotency_key,
+        inputs,
+        lambda: generate_proposal(**inputs)
+    )
+
+# Server-sent events: one "section" event per completed section, then "done"
+@router.post("/generate/stream")
+async def stream_proposal_endpoint(session_id: str = Form(...)):
+    return sse_response(stream_proposal(session_id))
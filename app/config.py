@@ -1,4 +1,5 @@
 import os
+import json
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -8,6 +9,153 @@ GRANT_API_URL = os.getenv("GRANT_API_URL")
 
 SOURCE_DIR = "app/data/tgci_sources"
 VECTOR_DB_PATH = "app/data/vectorstore/tgci_faiss"
+TGCI_KNOWLEDGE_BUNDLE_PATH = os.path.join(VECTOR_DB_PATH, "tgci_knowledge.json")
 
 EMBEDDING_MODEL = "text-embedding-3-large"
 
+# LLM client
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "200"))  # in-flight chat completions per worker
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "180"))
+
+# LLM response cache (in-memory LRU in front of a SQLite file)
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+LLM_CACHE_MEMORY_ENTRIES = int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "512"))
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+LLM_CACHE_DB_PATH = os.getenv("LLM_CACHE_DB_PATH", "app/data/cache/llm_cache.sqlite3")
+
+# Session stores (org analyses, grant analyses)
+# memory | sqlite. With several uvicorn workers sessions must live in the shared SQLite file.
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+SESSION_STORE_BACKEND = os.getenv("SESSION_STORE_BACKEND", "sqlite" if WEB_CONCURRENCY > 1 else "memory")
+SESSION_STORE_MAX_ENTRIES = int(os.getenv("SESSION_STORE_MAX_ENTRIES", "10000"))
+SESSION_STORE_TTL_SECONDS = int(os.getenv("SESSION_STORE_TTL_SECONDS", str(24 * 3600)))
+SESSION_STORE_DB_PATH = os.getenv("SESSION_STORE_DB_PATH", "app/data/cache/sessions.sqlite3")
+SESSION_STORE_BUSY_TIMEOUT_MS = int(os.getenv("SESSION_STORE_BUSY_TIMEOUT_MS", "5000"))
+# SQLite reads refresh an entry's LRU timestamp at most this often
+SESSION_STORE_ACCESS_REFRESH_SECONDS = int(os.getenv("SESSION_STORE_ACCESS_REFRESH_SECONDS", "60"))
+
+# Prompt context budgets (tokens)
+CONTEXT_TOKEN_BUDGETS = {
+    "readiness": int(os.getenv("READINESS_CONTEXT_TOKENS", "6000")),
+    "grant_generation": int(os.getenv("GRANT_GENERATION_CONTEXT_TOKENS", "3000")),
+    "grant_analysis": int(os.getenv("GRANT_ANALYSIS_CONTEXT_TOKENS", "24000")),
+    "loi": int(os.getenv("LOI_CONTEXT_TOKENS", "4000")),
+    "proposal": int(os.getenv("PROPOSAL_CONTEXT_TOKENS", "6000")),
+}
+WEBSITE_TEXT_TOKEN_BUDGET = int(os.getenv("WEBSITE_TEXT_TOKEN_BUDGET", "3000"))
+TOKENIZER_MODEL = os.getenv("TOKENIZER_MODEL", "gpt-4.1")
+
+# Proposal generation: "single" call or concurrent "sections"
+PROPOSAL_GENERATION_MODE = os.getenv("PROPOSAL_GENERATION_MODE", "single")
+PROPOSAL_SECTION_CONCURRENCY = int(os.getenv("PROPOSAL_SECTION_CONCURRENCY", "5"))
+PROPOSAL_CONSISTENCY_PASS = os.getenv("PROPOSAL_CONSISTENCY_PASS", "false").lower() == "true"
+
+# Background jobs
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_QUEUE_MAX_SIZE = int(os.getenv("JOB_QUEUE_MAX_SIZE", "1000"))
+JOB_DEFAULT_PRIORITY = int(os.getenv("JOB_DEFAULT_PRIORITY", "5"))  # 0 = most urgent
+JOB_MAX_PRIORITY = int(os.getenv("JOB_MAX_PRIORITY", "9"))
+# Most urgent priority a client may request; lower values are reserved for the server
+JOB_MIN_CLIENT_PRIORITY = int(os.getenv("JOB_MIN_CLIENT_PRIORITY", str(JOB_DEFAULT_PRIORITY)))
+JOB_RESULT_TTL_SECONDS = int(os.getenv("JOB_RESULT_TTL_SECONDS", "3600"))
+
+# Idempotency-Key results
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", str(24 * 3600)))
+
+# OpenAI rate limiting (per model, account-wide: split evenly across WEB_CONCURRENCY workers). Override with LLM_RATE_LIMITS='{"gpt-4.1": {"rpm": 500, "tpm": 30000}}'
+LLM_RATE_LIMITS = {
+    "gpt-4.1": {"rpm": 5000, "tpm": 2000000},
+    "gpt-5": {"rpm": 5000, "tpm": 2000000},
+    "gpt-4o-mini": {"rpm": 10000, "tpm": 10000000},
+    **json.loads(os.getenv("LLM_RATE_LIMITS", "{}")),
+}
+LLM_DEFAULT_RATE_LIMIT = {"rpm": 500, "tpm": 200000}
+LLM_DEFAULT_COMPLETION_TOKENS = int(os.getenv("LLM_DEFAULT_COMPLETION_TOKENS", "2000"))
+# AIMD concurrency per model: grow by one per window of successes, shrink on 429 or slow calls
+LLM_ADAPTIVE_MIN_CONCURRENCY = int(os.getenv("LLM_ADAPTIVE_MIN_CONCURRENCY", "2"))
+LLM_ADAPTIVE_INITIAL_CONCURRENCY = int(os.getenv("LLM_ADAPTIVE_INITIAL_CONCURRENCY", "32"))
+LLM_LATENCY_TARGET_SECONDS = float(os.getenv("LLM_LATENCY_TARGET_SECONDS", "90"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))   # our own 429/5xx retries; SDK retries are off
+LLM_KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("LLM_KEEPALIVE_EXPIRY_SECONDS", "30"))
+
+# Tail-latency routing per call site: fallback chain, per-model stage timeouts, hedge delay.
+# Override with LLM_ROUTING='{"grant_analysis": {...}}'
+LLM_ROUTING = {
+    "grant_analysis": {
+        "fallbacks": ["gpt-4.1", "gpt-4o-mini"],
+        "stage_timeouts": {"gpt-5": 180, "gpt-4.1": 90, "gpt-4o-mini": 45},
+        "hedge_after": 90,
+    },
+    "readiness": {
+        "fallbacks": ["gpt-4o-mini"],
+        "stage_timeouts": {"gpt-4.1": 60, "gpt-4o-mini": 30},
+        "hedge_after": 20,
+    },
+    **json.loads(os.getenv("LLM_ROUTING", "{}")),
+}
+LLM_HEDGE_MAX_RATIO = float(os.getenv("LLM_HEDGE_MAX_RATIO", "0.1"))  # hedges per routed call, at most
+LLM_REQUEST_DEADLINE_SECONDS = float(os.getenv("LLM_REQUEST_DEADLINE_SECONDS", "300"))
+
+# Cheap-model cascade for classification steps (readiness, RFP detection)
+CASCADE_ENABLED = os.getenv("CASCADE_ENABLED", "true").lower() == "true"
+CASCADE_SMALL_MODEL = os.getenv("CASCADE_SMALL_MODEL", "gpt-4o-mini")
+CASCADE_MIN_CONFIDENCE = float(os.getenv("CASCADE_MIN_CONFIDENCE", "0.8"))
+CASCADE_AUDIT_RATE = float(os.getenv("CASCADE_AUDIT_RATE", "0.05"))  # share of cheap decisions re-checked by the large model
+# Readiness scores within CASCADE_BORDERLINE_MARGIN of a class boundary are escalated
+CASCADE_READINESS_BOUNDARIES = (40, 75)
+CASCADE_BORDERLINE_MARGIN = int(os.getenv("CASCADE_BORDERLINE_MARGIN", "7"))
+# Distinct funding keywords in the text: none -> not a grant, >= STRONG -> skip the small model
+CASCADE_GRANT_STRONG_SIGNALS = int(os.getenv("CASCADE_GRANT_STRONG_SIGNALS", "6"))
+
+# Outbound HTTP (website scraping, RFP URLs)
+HTTP_TIMEOUT_SECONDS = float(os.getenv("HTTP_TIMEOUT_SECONDS", "15"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_CONNECTIONS_PER_HOST = int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", "6"))
+HTTP_MAX_DOWNLOAD_BYTES = int(os.getenv("HTTP_MAX_DOWNLOAD_BYTES", str(20 * 1024 * 1024)))
+HTTP_USER_AGENT = os.getenv("HTTP_USER_AGENT", "Mozilla/5.0 (compatible; TGCI-Proposal-Assistant)")
+
+# Conditional-GET cache of text extracted from websites and RFP URLs
+HTTP_CACHE_ENABLED = os.getenv("HTTP_CACHE_ENABLED", "true").lower() == "true"
+HTTP_CACHE_MAX_AGE_SECONDS = int(os.getenv("HTTP_CACHE_MAX_AGE_SECONDS", "3600"))  # reused without revalidation
+HTTP_CACHE_TTL_SECONDS = int(os.getenv("HTTP_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))  # kept for revalidation
+HTTP_CACHE_MAX_BYTES = int(os.getenv("HTTP_CACHE_MAX_BYTES", str(128 * 1024 * 1024)))
+HTTP_CACHE_DB_PATH = os.getenv("HTTP_CACHE_DB_PATH", "app/data/cache/http_cache.sqlite3")
+
+# Onboarding website crawl: same-site pages, within page/time/byte budgets
+CRAWL_MAX_PAGES = int(os.getenv("CRAWL_MAX_PAGES", "8"))  # 1 = landing page only
+CRAWL_MAX_DEPTH = int(os.getenv("CRAWL_MAX_DEPTH", "2"))
+CRAWL_TIME_BUDGET_SECONDS = float(os.getenv("CRAWL_TIME_BUDGET_SECONDS", "20"))
+CRAWL_MAX_BYTES = int(os.getenv("CRAWL_MAX_BYTES", str(5 * 1024 * 1024)))  # downloaded HTML, all pages
+CRAWL_MAX_PAGE_BYTES = int(os.getenv("CRAWL_MAX_PAGE_BYTES", str(2 * 1024 * 1024)))
+CRAWL_CONCURRENCY = int(os.getenv("CRAWL_CONCURRENCY", "4"))
+CRAWL_HOST_DELAY_SECONDS = float(os.getenv("CRAWL_HOST_DELAY_SECONDS", "0.25"))  # between request starts
+
+# HTML text extraction: auto | selectolax | lxml | trafilatura | bs4
+HTML_EXTRACTOR_BACKEND = os.getenv("HTML_EXTRACTOR_BACKEND", "auto")
+
+# RFP uploads are spooled to disk (content-addressed) instead of held in memory
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(50 * 1024 * 1024)))
+UPLOAD_SPOOL_DIR = os.getenv("UPLOAD_SPOOL_DIR", "app/data/cache/uploads")
+UPLOAD_SPOOL_TTL_SECONDS = int(os.getenv("UPLOAD_SPOOL_TTL_SECONDS", str(24 * 3600)))
+UPLOAD_SPOOL_PURGE_INTERVAL_SECONDS = int(os.getenv("UPLOAD_SPOOL_PURGE_INTERVAL_SECONDS", "300"))
+
+# Document text extraction: PDF pages in a process pool, in bounded batches
+DOC_EXTRACT_WORKERS = int(os.getenv("DOC_EXTRACT_WORKERS", str(min(os.cpu_count() or 1, 8))))
+DOC_EXTRACT_BATCH_PAGES = int(os.getenv("DOC_EXTRACT_BATCH_PAGES", "8"))
+DOC_EXTRACT_MAX_CHARS = int(os.getenv("DOC_EXTRACT_MAX_CHARS", "2000000"))  # stop reading past this
+# PDF text engine: auto | pypdfium2 | pypdf | pdfplumber
+DOC_EXTRACT_PDF_BACKEND = os.getenv("DOC_EXTRACT_PDF_BACKEND", "auto")
+
+# Extracted RFP text, keyed by SHA-256 of the document bytes (LRU by size on disk)
+DOC_TEXT_CACHE_ENABLED = os.getenv("DOC_TEXT_CACHE_ENABLED", "true").lower() == "true"
+DOC_TEXT_CACHE_MAX_BYTES = int(os.getenv("DOC_TEXT_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+DOC_TEXT_CACHE_DB_PATH = os.getenv("DOC_TEXT_CACHE_DB_PATH", "app/data/cache/document_text.sqlite3")
+
+# Memo of /grant/analyze results per (org profile, RFP text, prompt version)
+GRANT_ANALYSIS_MEMO_ENABLED = os.getenv("GRANT_ANALYSIS_MEMO_ENABLED", "true").lower() == "true"
+GRANT_ANALYSIS_MEMO_TTL_SECONDS = int(os.getenv("GRANT_ANALYSIS_MEMO_TTL_SECONDS", str(7 * 24 * 3600)))
+
+# Local BM25 pre-filter that trims long RFPs before the analysis call
+RFP_PREFILTER_ENABLED = os.getenv("RFP_PREFILTER_ENABLED", "true").lower() == "true"
+RFP_PREFILTER_TOKENS = int(os.getenv("RFP_PREFILTER_TOKENS", "8000"))
@@ -1,14 +1,58 @@
 # app/data/grant_store.py
-from typing import Dict
+import hashlib
+import json
 from datetime import datetime
+from app.config import GRANT_ANALYSIS_MEMO_TTL_SECONDS
+from app.data.session_store import create_session_store
+from app.utils.context_packer import DROP_KEYS
 
-GRANT_ANALYSIS_STORE: Dict[str, dict] = {}
+# Memo table of grant analyses. Keys are "<profile>:<rfp>:<prompt version>"
+# hashes (see grant_analysis_key): an edited profile, RFP or prompt gets a
+# new key, and entries for the old one simply expire.
+GRANT_ANALYSIS_STORE = create_session_store("grant_analysis", ttl_seconds=GRANT_ANALYSIS_MEMO_TTL_SECONDS)
 
-def save_grant_analysis(session_id: str, analysis: dict):
-    GRANT_ANALYSIS_STORE[session_id] = {
+_counters = {"hits": 0, "misses": 0, "writes": 0}
+
+
+def _strip_bookkeeping(value):
+    if isinstance(value, dict):
+        return {k: _strip_bookkeeping(v) for k, v in value.items() if k not in DROP_KEYS}
+    if isinstance(value, list):
+        return [_strip_bookkeeping(v) for v in value]
+    return value
+
+
+def profile_fingerprint(org_data: dict) -> str:
+    """
+    SHA-256 of an organization record without bookkeeping fields
+    (timestamps, session ids, grant options): two sessions with the same
+    profile share a fingerprint, and any edit to the profile changes it.
+    """
+    canonical = json.dumps(_strip_bookkeeping(org_data), sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def grant_analysis_key(fingerprint: str, opportunity_text: str, prompt_version: str) -> str:
+    text_hash = hashlib.sha256(opportunity_text.encode("utf-8")).hexdigest()
+    return f"{fingerprint}:{text_hash}:{prompt_version}"
+
+
+def save_grant_analysis(key: str, analysis: dict):
+    GRANT_ANALYSIS_STORE.set(key, {
         "analysis": analysis,
         "created_at": datetime.utcnow()
-    }
+    })
+    _counters["writes"] += 1
+
+
+def get_grant_analysis(key: str):
+    record = GRANT_ANALYSIS_STORE.get(key)
+    _counters["hits" if record else "misses"] += 1
+    return record
+
 
-def get_grant_analysis(session_id: str):
-    return GRANT_ANALYSIS_STORE.get(session_id)
+def grant_analysis_stats() -> dict:
+    stats = dict(_counters)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+    return stats
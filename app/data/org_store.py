@@ -1,22 +1,82 @@
 # app/data/org_store.py
-from typing import Dict
 from datetime import datetime
+from app.data.session_store import create_session_store
+
+class InvalidSessionError(ValueError):
+    """Unknown or expired session id (404)."""
+    pass
 
 # key can be org URL or org_id
-ORG_ANALYSIS_STORE: Dict[str, dict] = {}
+ORG_ANALYSIS_STORE = create_session_store("org_analysis")
+
+# Keys that only exist on reference records (see save_session_reference)
+_REFERENCE_KEYS = ("parent_session_id", "delta")
 
 def save_organization_analysis(key: str, payload: dict, analysis: dict):
     """
     Save the analyzed organization data.
     """
-    ORG_ANALYSIS_STORE[key] = {
+    ORG_ANALYSIS_STORE.set(key, {
         "payload": payload,         # input data (mission, website_name, etc.)
         "analysis": analysis,       # AI analysis result
         "created_at": datetime.utcnow()
-    }
+    })
+
+def _touch_ancestors(key: str):
+    while key:
+        record = ORG_ANALYSIS_STORE.get(key)
+        if not record or not ORG_ANALYSIS_STORE.touch(key):
+            return
+        key = record.get("parent_session_id")
+
+def save_session_reference(key: str, parent_key: str, payload: dict, delta: dict):
+    """
+    Save a session derived from another one (org + selected/uploaded grant).
+    Only the parent id and the new data are stored; the parent record is
+    resolved when the session is read, never copied. The parent chain's
+    TTL is restarted after the write, so ancestors neither expire nor
+    fall out of the LRU before the new child.
+    """
+    ORG_ANALYSIS_STORE.set(key, {
+        "payload": payload,
+        "parent_session_id": parent_key,
+        "delta": delta,             # e.g. {"grant": {...}}
+        "created_at": datetime.utcnow()
+    })
+    _touch_ancestors(parent_key)
 
 def get_organization_analysis(key: str):
     """
     Retrieve saved organization analysis.
+    Reference sessions are resolved to the usual shape:
+    {"payload", "analysis": {"organization": <parent>, **delta}, "created_at"}.
+    Returns None if the session (or any parent) is missing or expired.
     """
-    return ORG_ANALYSIS_STORE.get(key)
+    record = ORG_ANALYSIS_STORE.get(key)
+    if not record or "parent_session_id" not in record:
+        return record
+
+    parent = get_organization_analysis(record["parent_session_id"])
+    if not parent:
+        return None
+
+    # grant_options are transient selection state, not part of the org profile
+    organization = {k: v for k, v in parent.items() if k != "grant_options"}
+
+    resolved = {k: v for k, v in record.items() if k not in _REFERENCE_KEYS}
+    resolved["analysis"] = {"organization": organization, **record["delta"]}
+    return resolved
+
+def save_grant_options(key: str, grants: list):
+    """
+    Attach generated grant options to an existing organization session.
+    Runs as one atomic read-modify-write so concurrent workers cannot
+    overwrite each other's changes.
+    """
+    def _attach(org_data):
+        if not org_data:
+            raise InvalidSessionError("Invalid org session")
+        org_data["grant_options"] = grants
+        return org_data
+
+    return ORG_ANALYSIS_STORE.update(key, _attach)
@@ -0,0 +1,320 @@
+# app/data/session_store.py
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import contextmanager
+from app.config import (
+    SESSION_STORE_BACKEND,
+    SESSION_STORE_MAX_ENTRIES,
+    SESSION_STORE_TTL_SECONDS,
+    SESSION_STORE_DB_PATH,
+    SESSION_STORE_BUSY_TIMEOUT_MS,
+    SESSION_STORE_ACCESS_REFRESH_SECONDS
+)
+
+
+class SessionStore(ABC):
+    """
+    Bounded key/value store for session records.
+    Entries expire TTL seconds after their last write; once the store is
+    full the least recently used entry is evicted.
+    """
+
+    def __init__(self, namespace: str, max_entries: int, ttl_seconds: int):
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._counters = {
+            "hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "evictions": 0,
+            "expirations": 0
+        }
+
+    @abstractmethod
+    def get(self, key: str):
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value):
+        ...
+
+    @abstractmethod
+    def update(self, key: str, fn):
+        """
+        Atomically replace the value under key with fn(current_value).
+        fn receives None when the key is missing and must return the
+        new value. Returns the new value.
+        """
+
+    @abstractmethod
+    def touch(self, key: str) -> bool:
+        """
+        Restart the TTL of a live entry and mark it recently used, without
+        rewriting it. Returns False when the key is missing or expired.
+        """
+
+    @abstractmethod
+    def delete(self, key: str):
+        ...
+
+    @abstractmethod
+    def __len__(self):
+        ...
+
+    def __contains__(self, key: str):
+        return self.get(key) is not None
+
+    def stats(self) -> dict:
+        stats = dict(self._counters)
+        stats["backend"] = type(self).__name__
+        stats["entries"] = len(self)
+        stats["max_entries"] = self.max_entries
+        return stats
+
+
+class MemorySessionStore(SessionStore):
+    """In-process LRU + TTL store. Fast, but lost on restart."""
+
+    def __init__(self, namespace: str, max_entries: int, ttl_seconds: int):
+        super().__init__(namespace, max_entries, ttl_seconds)
+        self._data = OrderedDict()   # key -> (value, expires_at)
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self._counters["misses"] += 1
+                return None
+
+            value, expires_at = entry
+            if expires_at <= time.time():
+                del self._data[key]
+                self._counters["expirations"] += 1
+                self._counters["misses"] += 1
+                return None
+
+            self._data.move_to_end(key)
+            self._counters["hits"] += 1
+            return value
+
+    def set(self, key: str, value):
+        with self._lock:
+            self._put(key, value)
+
+    def _put(self, key: str, value):
+        self._data[key] = (value, time.time() + self.ttl_seconds)
+        self._data.move_to_end(key)
+        self._counters["writes"] += 1
+
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    def update(self, key: str, fn):
+        with self._lock:
+            entry = self._data.get(key)
+            current = entry[0] if entry and entry[1] > time.time() else None
+            value = fn(current)
+            self._put(key, value)
+            return value
+
+    def touch(self, key: str) -> bool:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[1] <= time.time():
+                return False
+            self._data[key] = (entry[0], time.time() + self.ttl_seconds)
+            self._data.move_to_end(key)
+            return True
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Persistent store on a SQLite file in WAL mode (one table per namespace).
+    Safe to share between uvicorn workers: every process opens its own
+    connection, and writes take the database write lock (BEGIN IMMEDIATE)
+    so read-modify-write updates are atomic across processes. Plain reads
+    take no write lock; the LRU timestamp of an entry is refreshed by a
+    separate short write at most every SESSION_STORE_ACCESS_REFRESH_SECONDS.
+    Values are pickled, so datetimes and nested dicts round-trip unchanged.
+    """
+
+    def __init__(self, namespace: str, max_entries: int, ttl_seconds: int, db_path: str):
+        super().__init__(namespace, max_entries, ttl_seconds)
+        self.db_path = db_path
+        self._table = f"sessions_{namespace}"
+        self._lock = threading.Lock()
+        self._conn = None
+        self._conn_pid = None
+
+    def _connect(self):
+        # Connections must not cross a fork: reopen in each worker process
+        if self._conn is None or self._conn_pid != os.getpid():
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            conn = sqlite3.connect(
+                self.db_path,
+                timeout=SESSION_STORE_BUSY_TIMEOUT_MS / 1000,
+                isolation_level=None,   # explicit transactions below
+                check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                f"""
+                CREATE TABLE IF NOT EXISTS {self._table} (
+                    key TEXT PRIMARY KEY,
+                    value BLOB NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{self._table}_access ON {self._table}(last_access)"
+            )
+            self._conn = conn
+            self._conn_pid = os.getpid()
+        return self._conn
+
+    @contextmanager
+    def _write_transaction(self):
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def _read(self, conn, key: str, now: float):
+        row = conn.execute(
+            f"SELECT value, expires_at FROM {self._table} WHERE key = ?", (key,)
+        ).fetchone()
+
+        if row is None:
+            return None
+
+        value, expires_at = row
+        if expires_at <= now:
+            conn.execute(f"DELETE FROM {self._table} WHERE key = ?", (key,))
+            self._counters["expirations"] += 1
+            return None
+
+        conn.execute(f"UPDATE {self._table} SET last_access = ? WHERE key = ?", (now, key))
+        return pickle.loads(value)
+
+    def _write(self, conn, key: str, value, now: float):
+        conn.execute(
+            f"INSERT OR REPLACE INTO {self._table} (key, value, expires_at, last_access) "
+            "VALUES (?, ?, ?, ?)",
+            (key, pickle.dumps(value), now + self.ttl_seconds, now)
+        )
+        self._counters["writes"] += 1
+        self._evict(conn, now)
+
+    def get(self, key: str):
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                f"SELECT value, expires_at, last_access FROM {self._table} WHERE key = ?", (key,)
+            ).fetchone()
+
+            # Expired rows are deleted by the next write (_evict)
+            if row is None or row[1] <= now:
+                self._counters["misses"] += 1
+                return None
+
+            if now - row[2] >= SESSION_STORE_ACCESS_REFRESH_SECONDS:
+                try:
+                    conn.execute(f"UPDATE {self._table} SET last_access = ? WHERE key = ?", (now, key))
+                except sqlite3.OperationalError:
+                    pass   # database busy: the LRU timestamp can wait for the next read
+
+        self._counters["hits"] += 1
+        return pickle.loads(row[0])
+
+    def set(self, key: str, value):
+        with self._write_transaction() as conn:
+            self._write(conn, key, value, time.time())
+
+    def update(self, key: str, fn):
+        with self._write_transaction() as conn:
+            now = time.time()
+            value = fn(self._read(conn, key, now))
+            self._write(conn, key, value, now)
+        return value
+
+    def _evict(self, conn, now: float):
+        expired = conn.execute(f"DELETE FROM {self._table} WHERE expires_at <= ?", (now,)).rowcount
+        self._counters["expirations"] += max(expired, 0)
+
+        overflow = conn.execute(f"SELECT COUNT(*) FROM {self._table}").fetchone()[0] - self.max_entries
+        if overflow > 0:
+            conn.execute(
+                f"DELETE FROM {self._table} WHERE key IN "
+                f"(SELECT key FROM {self._table} ORDER BY last_access ASC LIMIT ?)",
+                (overflow,)
+            )
+            self._counters["evictions"] += overflow
+
+    def touch(self, key: str) -> bool:
+        with self._write_transaction() as conn:
+            now = time.time()
+            touched = conn.execute(
+                f"UPDATE {self._table} SET expires_at = ?, last_access = ? WHERE key = ? AND expires_at > ?",
+                (now + self.ttl_seconds, now, key, now)
+            ).rowcount
+        return touched > 0
+
+    def delete(self, key: str):
+        with self._write_transaction() as conn:
+            conn.execute(f"DELETE FROM {self._table} WHERE key = ?", (key,))
+
+    def __len__(self):
+        with self._lock:
+            return self._connect().execute(f"SELECT COUNT(*) FROM {self._table}").fetchone()[0]
+
+
+# namespace -> store, so /metrics can report on every store in the process
+SESSION_STORES = {}
+
+
+def create_session_store(
+    namespace: str,
+    backend: str = SESSION_STORE_BACKEND,
+    max_entries: int = SESSION_STORE_MAX_ENTRIES,
+    ttl_seconds: int = SESSION_STORE_TTL_SECONDS
+) -> SessionStore:
+    """
+    Build the session store selected by SESSION_STORE_BACKEND.
+    """
+    if backend == "memory":
+        store = MemorySessionStore(namespace, max_entries, ttl_seconds)
+    elif backend == "sqlite":
+        store = SQLiteSessionStore(namespace, max_entries, ttl_seconds, SESSION_STORE_DB_PATH)
+    else:
+        raise ValueError(f"Unknown SESSION_STORE_BACKEND: {backend}")
+
+    SESSION_STORES[namespace] = store
+    return store
+
+
+def session_store_stats() -> dict:
+    return {name: store.stats() for name, store in SESSION_STORES.items()}
@@ -1,21 +1,123 @@
 # main.py
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from app.api.v1.endpoints.onboarding import router as analyze_router
 from app.api.v1.endpoints.grant_opportunity import router as opportunity_router
 from app.api.v1.endpoints.loi import router as loi_router
 from app.api.v1.endpoints.proposal import router as proposal_router
 from app.api.v1.endpoints.grant_generator import router as grant_router
+from app.api.v1.endpoints.jobs import router as jobs_router
+from app.services.tgci_knowledge import start_tgci_warmup, tgci_knowledge_status
+from app.services.llm_cache import llm_cache
+from app.data.session_store import session_store_stats
+from app.services.job_queue import start_job_workers, stop_job_workers, job_queue_stats
+from app.services.single_flight import IdempotencyKeyConflictError, single_flight_stats
+from app.services.llm_client import close_openai_client, routing_stats, prompt_cache_stats
+from app.utils.deadline import set_request_deadline, reset_request_deadline
+from app.config import LLM_REQUEST_DEADLINE_SECONDS
+from app.services.rate_limiter import rate_limiter_stats
+from app.services.cascade import cascade_stats
+from app.services.http_fetch import close_http_client, http_fetch_stats
+from app.services.http_cache import http_text_cache
+from app.services.upload_spool import UploadTooLargeError, UploadSizeLimitMiddleware
+from app.services.document_extract import shutdown_extraction_pool, resolve_pdf_backend, DocumentExtractionError
+from app.services.text_cache import document_text_cache
+from app.data.grant_store import grant_analysis_stats
+from app.data.org_store import InvalidSessionError
+from app.rag.rfp_filter import rfp_prefilter_stats
 
-app = FastAPI(title="TGCI Proposal Assistant")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Fail fast on a misconfigured or missing PDF engine instead of
+    # extracting empty text from every PDF
+    resolve_pdf_backend()
+
+    # Load TGCI knowledge in the background so the server accepts traffic immediately
+    start_tgci_warmup()
+    start_job_workers()
+    yield
+    await stop_job_workers()
+    await close_openai_client()
+    await close_http_client()
+    shutdown_extraction_pool()
+
+
+app = FastAPI(title="TGCI Proposal Assistant", lifespan=lifespan)
+
+# Oversized uploads are refused before Starlette spools the multipart body
+app.add_middleware(UploadSizeLimitMiddleware)
+
+# Per-request deadline that LLM fallback stages must fit into.
+# Clients can shorten it with an X-Request-Timeout header (seconds).
+@app.middleware("http")
+async def request_deadline_middleware(request: Request, call_next):
+    seconds = LLM_REQUEST_DEADLINE_SECONDS
+    try:
+        seconds = min(seconds, float(request.headers.get("X-Request-Timeout", seconds)))
+    except ValueError:
+        pass
+
+    token = set_request_deadline(seconds)
+    try:
+        return await call_next(request)
+    finally:
+        reset_request_deadline(token)
+
+@app.exception_handler(IdempotencyKeyConflictError)
+async def idempotency_conflict_handler(request: Request, exc: IdempotencyKeyConflictError):
+    return JSONResponse(status_code=422, content={"detail": str(exc)})
+
+@app.exception_handler(InvalidSessionError)
+async def invalid_session_handler(request: Request, exc: InvalidSessionError):
+    return JSONResponse(status_code=404, content={"detail": str(exc)})
+
+@app.exception_handler(DocumentExtractionError)
+async def document_extraction_handler(request: Request, exc: DocumentExtractionError):
+    return JSONResponse(status_code=422, content={"detail": str(exc)})
+
+@app.exception_handler(UploadTooLargeError)
+async def upload_too_large_handler(request: Request, exc: UploadTooLargeError):
+    return JSONResponse(status_code=413, content={"detail": str(exc)})
 
 # Root endpoint for health check or welcome
 @app.get("/")
 def root():
     return {"message": "Welcome to the TGCI Proposal Assistant API"}
 
+# Readiness probe: 200 only once TGCI knowledge is loaded
+@app.get("/ready")
+def ready():
+    knowledge = tgci_knowledge_status()
+    status_code = 200 if knowledge["status"] == "ready" else 503
+    return JSONResponse(
+        status_code=status_code,
+        content={"ready": status_code == 200, "tgci_knowledge": knowledge}
+    )
+
+# Runtime counters for caches and stores
+@app.get("/metrics")
+def metrics():
+    return {
+        "llm_cache": llm_cache.stats(),
+        "session_stores": session_store_stats(),
+        "job_queue": job_queue_stats(),
+        "single_flight": single_flight_stats(),
+        "rate_limits": rate_limiter_stats(),
+        "llm_routing": routing_stats(),
+        "cascades": cascade_stats(),
+        "prompt_cache": prompt_cache_stats(),
+        "http_fetch": http_fetch_stats(),
+        "http_cache": http_text_cache.stats(),
+        "document_text_cache": document_text_cache.stats(),
+        "grant_analysis_memo": grant_analysis_stats(),
+        "rfp_prefilter": rfp_prefilter_stats()
+    }
+
 app.include_router(analyze_router)
 app.include_router(opportunity_router)
 app.include_router(grant_router)  
 app.include_router(loi_router)
 app.include_router(proposal_router)
-       
\ No newline at end of file
+app.include_router(jobs_router)
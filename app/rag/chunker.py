@@ -18,8 +18,10 @@ def split_by_structure(text: str):
     current_title = "GENERAL"
     buffer = ""
 
-    for part in splits:
-        if SECTION_PATTERN.match(part + "\n"):
+    # split() with one group alternates body, heading, body, ...; a match()
+    # on the heading alone cannot satisfy the pattern's (?<=\n) lookbehind
+    for i, part in enumerate(splits):
+        if i % 2:
             if buffer.strip():
                 sections.append((current_title, buffer.strip()))
             current_title = part.strip()
@@ -1,4 +1,6 @@
 import os
+import sys
+import json
 from langchain_community.document_loaders import PyPDFLoader
 from docx import Document as DocxDocument
 from langchain_openai import OpenAIEmbeddings
@@ -8,9 +10,12 @@ from app.config import (
     SOURCE_DIR,
     VECTOR_DB_PATH,
     OPENAI_API_KEY,
-    EMBEDDING_MODEL
+    EMBEDDING_MODEL,
+    TGCI_KNOWLEDGE_BUNDLE_PATH
 )
 from app.rag.chunker import create_chunks
+from app.rag.vector_store import load_vector_store
+from app.services.tgci_knowledge import build_tgci_knowledge_bundle
 
 
 def load_text(file_path: str) -> str:
@@ -45,9 +50,31 @@ def ingest_all_sources():
     vectorstore = FAISS.from_documents(all_chunks, embeddings)
     vectorstore.save_local(VECTOR_DB_PATH)
 
+    write_knowledge_bundle(vectorstore)
+
     print(f"\n✅ INGESTION COMPLETE")
     print(f"Total chunks stored: {len(all_chunks)}")
 
 
+def write_knowledge_bundle(vectorstore):
+    """
+    Precompute the canned TGCI knowledge queries so the API
+    never has to load FAISS or call the embeddings API.
+    """
+    bundle = build_tgci_knowledge_bundle(vectorstore)
+    bundle["index"]["sources"] = sorted(os.listdir(SOURCE_DIR))
+
+    tmp_path = TGCI_KNOWLEDGE_BUNDLE_PATH + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(bundle, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, TGCI_KNOWLEDGE_BUNDLE_PATH)
+
+    print(f"📦 Knowledge bundle written: {TGCI_KNOWLEDGE_BUNDLE_PATH}")
+
+
 if __name__ == "__main__":
-    ingest_all_sources()
+    # --bundle-only: rebuild the knowledge bundle from the existing index
+    if "--bundle-only" in sys.argv:
+        write_knowledge_bundle(load_vector_store())
+    else:
+        ingest_all_sources()
@@ -0,0 +1,180 @@
+# app/rag/rfp_filter.py
+import math
+import re
+from collections import Counter
+from app.config import RFP_PREFILTER_TOKENS
+from app.utils.context_packer import count_tokens
+from app.utils.text_clean import clean_text
+
+# BM25 parameters (the usual Okapi defaults)
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# What the analysis extracts, as BM25 queries. Each target gets its own
+# ranking so a long eligibility section cannot crowd out the deadline.
+EXTRACTION_QUERIES = {
+    "funder": "funder foundation sponsor agency department fund trust corporation issued by program officer contact about us",
+    "focus": "purpose priorities priority focus areas goals objectives outcomes impact funding interests support programs",
+    "deadline": "deadline due date dates timeline submit submission received by closes pm am est letter of intent loi",
+    "eligibility": "eligibility eligible applicants nonprofit 501 c 3 organizations requirements restrictions not eligible geographic",
+    "funding": "award amount awards range up to maximum minimum grant size funding available budget match duration",
+    "attachments": "attachments documents required budget audit financial statements irs determination letter letters of support board list appendix",
+    "format": "format application instructions narrative pages page limit font sections portal online apply how to questions",
+}
+
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were will with "
+    "you your we our their they which who may must should can all any".split()
+)
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Org profile fields whose text joins the queries
+_MISSION_KEYS = ("mission", "programs", "focus")
+
+_counters = {"calls": 0, "filtered": 0, "tokens_in": 0, "tokens_out": 0}
+
+
+def _terms(text: str) -> list:
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in _STOPWORDS]
+
+
+def mission_text(org_data) -> str:
+    """Mission, programs and focus strings found anywhere in an org record."""
+    found = []
+
+    def _walk(value, matched=False):
+        if isinstance(value, dict):
+            for key, child in value.items():
+                _walk(child, matched or any(k in str(key).lower() for k in _MISSION_KEYS))
+        elif isinstance(value, list):
+            for child in value:
+                _walk(child, matched)
+        elif matched and isinstance(value, str):
+            found.append(value)
+
+    _walk(org_data)
+    return " ".join(found)
+
+
+class BM25:
+    """Okapi BM25 over a small in-memory corpus of term lists."""
+
+    def __init__(self, documents: list):
+        self.documents = [Counter(doc) for doc in documents]
+        self.lengths = [len(doc) for doc in documents]
+        self.avg_length = sum(self.lengths) / len(documents) if documents else 0.0
+
+        df = Counter()
+        for doc in self.documents:
+            df.update(doc.keys())
+        n = len(documents)
+        self.idf = {term: math.log(1 + (n - count + 0.5) / (count + 0.5)) for term, count in df.items()}
+
+    def scores(self, query: list) -> list:
+        query = [term for term in set(query) if term in self.idf]
+        results = []
+        for doc, length in zip(self.documents, self.lengths):
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * length / (self.avg_length or 1))
+            score = 0.0
+            for term in query:
+                tf = doc.get(term)
+                if tf:
+                    score += self.idf[term] * tf * (BM25_K1 + 1) / (tf + norm)
+            results.append(score)
+        return results
+
+
+def _strip_overlap(previous: str, chunk: str) -> str:
+    # Adjacent chunks share up to the splitter's overlap; send it once
+    for size in range(min(len(previous), len(chunk), 200), 0, -1):
+        if previous.endswith(chunk[:size]):
+            return chunk[size:].lstrip()
+    return chunk
+
+
+def select_relevant_text(opportunity_text: str, org_data: dict = None, budget: int = RFP_PREFILTER_TOKENS) -> str:
+    """
+    Trim a long RFP to the sections that matter for the analysis.
+
+    Expects line-preserving text (clean_lines) so the RAG chunker can split
+    on section headings; chunks are flattened with clean_text afterwards,
+    and text within the budget is only flattened.
+
+    The text is chunked with the RAG chunker and every chunk is ranked by
+    BM25 against each extraction target and against the org's mission.
+    Chunks are taken round-robin from those rankings (the opening chunk,
+    which usually names the funder and program, always first) until
+    `budget` tokens are spent, then joined back in document order with
+    "[...]" where text was skipped.
+    """
+    total = count_tokens(opportunity_text)
+    _counters["calls"] += 1
+    _counters["tokens_in"] += total
+    if total <= budget:
+        _counters["tokens_out"] += total
+        return clean_text(opportunity_text)
+
+    # Imported here: the splitter stack adds ~0.5s to app startup
+    from app.rag.chunker import create_chunks
+
+    # The chunker keeps headings as metadata; put each back in front of its
+    # section's first chunk so it is ranked and sent along with the text
+    chunks, section = [], None
+    for doc in create_chunks(opportunity_text, source_name="rfp"):
+        chunk = clean_text(doc.page_content)
+        if doc.metadata["section"] != section:
+            section = doc.metadata["section"]
+            if section != "GENERAL":
+                chunk = f"{section}: {chunk}"
+        chunks.append(chunk)
+    index = BM25([_terms(chunk) for chunk in chunks])
+
+    queries = [_terms(query) for query in EXTRACTION_QUERIES.values()]
+    mission = _terms(mission_text(org_data or {}))
+    if mission:
+        queries.append(mission)
+
+    rankings = []
+    for query in queries:
+        scores = index.scores(query)
+        rankings.append([i for i in sorted(range(len(chunks)), key=lambda i: -scores[i]) if scores[i] > 0])
+
+    costs = [count_tokens(chunk) for chunk in chunks]
+    selected, remaining = set(), budget
+    if chunks and costs[0] <= remaining:
+        selected.add(0)
+        remaining -= costs[0]
+
+    positions = [0] * len(rankings)
+    while remaining > 0 and any(pos < len(ranking) for pos, ranking in zip(positions, rankings)):
+        for r, ranking in enumerate(rankings):
+            while positions[r] < len(ranking):
+                i = ranking[positions[r]]
+                positions[r] += 1
+                if i not in selected and costs[i] <= remaining:
+                    selected.add(i)
+                    remaining -= costs[i]
+                    break
+
+    parts, previous = [], None
+    for i in sorted(selected):
+        if previous is not None and i == previous + 1:
+            parts.append(_strip_overlap(chunks[previous], chunks[i]))
+        else:
+            if parts or i > 0:
+                parts.append("[...]")
+            parts.append(chunks[i])
+        previous = i
+    if chunks and previous != len(chunks) - 1:
+        parts.append("[...]")
+
+    text = " ".join(part for part in parts if part)
+    _counters["filtered"] += 1
+    _counters["tokens_out"] += count_tokens(text)
+    return text
+
+
+def rfp_prefilter_stats() -> dict:
+    stats = dict(_counters)
+    stats["token_reduction"] = round(1 - stats["tokens_out"] / stats["tokens_in"], 4) if stats["tokens_in"] else 0.0
+    return stats
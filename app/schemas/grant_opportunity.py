@@ -3,7 +3,8 @@ from typing import Optional, List, Literal
 
 # ---------------- INPUT ----------------
 class GrantOpportunityInput(BaseModel):
-    rfp_file: Optional[bytes] = Field(None, description="Upload RFP file")
+    rfp_file_path: Optional[str] = Field(None, description="Uploaded RFP file, spooled to disk")
+    rfp_file_sha256: Optional[str] = Field(None, description="SHA-256 of the uploaded RFP file")
     opportunity_url: Optional[str] = Field(None, description="Paste opportunity URL")
     opportunity_text: Optional[str] = Field(None, description="Paste opportunity text")
 
@@ -0,0 +1,16 @@
+from pydantic import BaseModel, Field
+from typing import Optional, Literal, Any
+from app.config import JOB_MAX_PRIORITY
+
+class JobStatusResponse(BaseModel):
+    job_id: str
+    operation: str
+    status: Literal["queued", "running", "succeeded", "failed"]
+    priority: int = Field(..., ge=0, le=JOB_MAX_PRIORITY)
+    created_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    error: Optional[str] = None
+
+class JobResultResponse(JobStatusResponse):
+    result: Optional[Any] = None
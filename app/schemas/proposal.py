@@ -19,6 +19,7 @@ class ProposalResponse(BaseModel):
     goals_and_objectives: str
     methods_and_activities: str
     evaluation_plan: str
+    organizational_capacity: str = ""
     sustainability_plan: str
     budget_summary: BudgetSummary
     conclusion: str
@@ -0,0 +1,92 @@
+# app/services/cascade.py
+import asyncio
+import random
+from app.config import CASCADE_AUDIT_RATE
+
+
+class CascadeStats:
+    """
+    Counters for one cheap-first cascade.
+
+    Decisions are taken by the local heuristic, the small model, or
+    escalated to the large model; large_calls_saved counts decisions that
+    avoided the large model entirely. Agreement is measured whenever both
+    a cheap and a large answer exist: inline (the large model ran anyway)
+    and on sampled background audits of cheap decisions.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.counters = {
+            "total": 0,
+            "decided_by_heuristic": 0,
+            "decided_by_small_model": 0,
+            "escalated": 0,
+            "large_calls_saved": 0,
+            "inline_compared": 0,
+            "inline_agreed": 0,
+            "audits": 0,
+            "audit_agreed": 0,
+            "audit_errors": 0
+        }
+
+    def record(self, stage: str, saved_large_call: bool = False):
+        self.counters["total"] += 1
+        self.counters[stage] += 1
+        self.counters["large_calls_saved"] += int(saved_large_call)
+
+    def record_agreement(self, agreed: bool):
+        self.counters["inline_compared"] += 1
+        self.counters["inline_agreed"] += int(agreed)
+
+    def stats(self) -> dict:
+        stats = dict(self.counters)
+        total = stats["total"] or 1
+        cheap = stats["decided_by_heuristic"] + stats["decided_by_small_model"]
+        stats["cheap_hit_rate"] = round(cheap / total, 4)
+        stats["large_call_savings_rate"] = round(stats["large_calls_saved"] / total, 4)
+        stats["audit_agreement_rate"] = (
+            round(stats["audit_agreed"] / stats["audits"], 4) if stats["audits"] else None
+        )
+        stats["inline_agreement_rate"] = (
+            round(stats["inline_agreed"] / stats["inline_compared"], 4)
+            if stats["inline_compared"] else None
+        )
+        return stats
+
+
+CASCADES = {}
+_audit_tasks = set()
+
+
+def get_cascade(name: str) -> CascadeStats:
+    if name not in CASCADES:
+        CASCADES[name] = CascadeStats(name)
+    return CASCADES[name]
+
+
+def maybe_audit(cascade: CascadeStats, audit):
+    """
+    With probability CASCADE_AUDIT_RATE, run audit() in the background.
+    audit is an async callable returning True when the large model agrees
+    with the cheap decision. Never delays the caller.
+    """
+    if random.random() >= CASCADE_AUDIT_RATE:
+        return
+
+    async def _run():
+        try:
+            agreed = await audit()
+        except Exception:
+            cascade.counters["audit_errors"] += 1
+            return
+        cascade.counters["audits"] += 1
+        cascade.counters["audit_agreed"] += int(agreed)
+
+    task = asyncio.create_task(_run())
+    _audit_tasks.add(task)
+    task.add_done_callback(_audit_tasks.discard)
+
+
+def cascade_stats() -> dict:
+    return {name: cascade.stats() for name, cascade in CASCADES.items()}
@@ -0,0 +1,337 @@
+# app/services/document_extract.py
+import asyncio
+import hashlib
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import aclosing
+from docx import Document
+from app.config import (
+    DOC_EXTRACT_WORKERS,
+    DOC_EXTRACT_BATCH_PAGES,
+    DOC_EXTRACT_MAX_CHARS,
+    DOC_EXTRACT_PDF_BACKEND,
+    DOC_TEXT_CACHE_ENABLED
+)
+from app.services.text_cache import document_text_cache
+from app.utils.text_clean import clean_lines
+from app.utils.file_format import detect_file_format, PDF, DOCX, HTML, TEXT
+from app.utils.html_extract import extract_html
+
+# Optional PDF engines, fastest first
+try:
+    import pypdfium2
+except ImportError:
+    pypdfium2 = None
+
+try:
+    import pypdf
+except ImportError:
+    pypdf = None
+
+try:
+    import pdfplumber
+except ImportError:
+    pdfplumber = None
+
+# PDFium is not thread-safe; pool workers are processes, but short
+# documents are read in threads of the server process.
+_pdfium_lock = threading.Lock()
+
+_pool = None
+
+class DocumentExtractionError(ValueError):
+    pass
+
+
+# Failures of the machine, not of the document: never read as "damaged file"
+INFRASTRUCTURE_ERRORS = (BrokenProcessPool, MemoryError, OSError)
+
+
+# ---------- PDF backends: page_count(path), pages(path, start, end) ----------
+def _pdfium_page_count(path: str) -> int:
+    with _pdfium_lock:
+        pdf = pypdfium2.PdfDocument(path)
+        try:
+            return len(pdf)
+        finally:
+            pdf.close()
+
+
+def _pdfium_pages(path: str, start: int, end: int) -> list:
+    texts = []
+    with _pdfium_lock:
+        pdf = pypdfium2.PdfDocument(path)
+        try:
+            for i in range(start, end):
+                page = pdf[i]
+                textpage = page.get_textpage()
+                texts.append(textpage.get_text_range())
+                textpage.close()
+                page.close()
+        finally:
+            pdf.close()
+    return texts
+
+
+def _pypdf_page_count(path: str) -> int:
+    return len(pypdf.PdfReader(path).pages)
+
+
+def _pypdf_pages(path: str, start: int, end: int) -> list:
+    reader = pypdf.PdfReader(path)
+    return [reader.pages[i].extract_text() or "" for i in range(start, end)]
+
+
+def _pdfplumber_page_count(path: str) -> int:
+    with pdfplumber.open(path) as pdf:
+        return len(pdf.pages)
+
+
+def _pdfplumber_pages(path: str, start: int, end: int) -> list:
+    texts = []
+    with pdfplumber.open(path) as pdf:
+        for page in pdf.pages[start:end]:
+            texts.append(page.extract_text() or "")
+            page.flush_cache()   # keep worker memory flat on long documents
+    return texts
+
+
+PDF_BACKENDS = {
+    name: (count, pages) for name, count, pages, available in [
+        ("pypdfium2", _pdfium_page_count, _pdfium_pages, pypdfium2 is not None),
+        ("pypdf", _pypdf_page_count, _pypdf_pages, pypdf is not None),
+        ("pdfplumber", _pdfplumber_page_count, _pdfplumber_pages, pdfplumber is not None),
+    ] if available
+}
+
+
+def resolve_pdf_backend(backend: str = None) -> str:
+    backend = backend or DOC_EXTRACT_PDF_BACKEND
+    if backend == "auto":
+        if not PDF_BACKENDS:
+            raise ValueError("No PDF backend installed (pypdfium2, pypdf or pdfplumber)")
+        return next(iter(PDF_BACKENDS))
+    if backend not in PDF_BACKENDS:
+        raise ValueError(f"PDF backend {backend!r} is not installed")
+    return backend
+
+
+def pdf_page_count(path: str, backend: str = None) -> int:
+    return PDF_BACKENDS[resolve_pdf_backend(backend)][0](path)
+
+
+def extract_pdf_pages(path: str, start: int, end: int, backend: str = None) -> list:
+    """Text of pages [start, end) of a PDF. Runs in a pool worker."""
+    return PDF_BACKENDS[resolve_pdf_backend(backend)][1](path, start, end)
+
+
+# ---------- other formats: path -> text ----------
+def extract_docx_text(path: str) -> str:
+    doc = Document(path)
+    return "\n".join([p.text for p in doc.paragraphs if p.text.strip()])
+
+
+def _read_text(path: str) -> str:
+    with open(path, "rb") as f:
+        return f.read().decode("utf-8", errors="replace")
+
+
+def extract_html_file(path: str) -> str:
+    return extract_html(_read_text(path))["text"]
+
+
+FILE_BACKENDS = {
+    DOCX: extract_docx_text,
+    HTML: extract_html_file,
+    TEXT: _read_text,
+}
+
+
+def get_extraction_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn: forking a process with a running event loop and threads is unsafe
+        _pool = ProcessPoolExecutor(
+            max_workers=DOC_EXTRACT_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _pool
+
+
+def shutdown_extraction_pool(pool: ProcessPoolExecutor = None):
+    """Shut down the pool; with pool given, only if it is still the current one."""
+    global _pool
+    if _pool is not None and (pool is None or pool is _pool):
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+async def _pool_batches(path: str, first_page: int, pages: int, backend: str):
+    """Yield (start_page, texts) for each batch from first_page on, in order."""
+    loop = asyncio.get_running_loop()
+    pool = get_extraction_pool()
+    batches = iter(range(first_page, pages, DOC_EXTRACT_BATCH_PAGES))
+    in_flight = []
+
+    def _submit():
+        start = next(batches, None)
+        if start is not None:
+            future = loop.run_in_executor(
+                pool, extract_pdf_pages, path, start, min(start + DOC_EXTRACT_BATCH_PAGES, pages), backend
+            )
+            in_flight.append((start, future))
+
+    try:
+        for _ in range(DOC_EXTRACT_WORKERS):
+            _submit()
+
+        while in_flight:
+            start, future = in_flight.pop(0)
+            batch = await future
+            _submit()
+            yield start, batch
+    except BrokenProcessPool:
+        # A worker died (e.g. OOM kill): the executor is unusable from now on
+        shutdown_extraction_pool(pool)
+        raise
+    finally:
+        for _, future in in_flight:
+            future.cancel()
+
+
+async def iter_pdf_pages(path: str, max_chars: int = DOC_EXTRACT_MAX_CHARS, backend: str = None):
+    """
+    Yield the text of each PDF page, in order.
+
+    Pages are extracted in batches of DOC_EXTRACT_BATCH_PAGES across the
+    process pool, with at most one batch per worker in flight, so memory
+    stays flat however long the document is. Stops once max_chars have
+    been yielded. If the pool breaks, it is rebuilt and extraction resumes
+    once from the first missing page.
+    """
+    backend = resolve_pdf_backend(backend)
+    pages = await asyncio.to_thread(pdf_page_count, path, backend)
+
+    # Short documents are not worth a round trip to the pool
+    if pages <= DOC_EXTRACT_BATCH_PAGES:
+        for text in await asyncio.to_thread(extract_pdf_pages, path, 0, pages, backend):
+            yield text
+        return
+
+    next_page, produced, retried = 0, 0, False
+    while next_page < pages:
+        try:
+            async with aclosing(_pool_batches(path, next_page, pages, backend)) as batches:
+                async for start, batch in batches:
+                    next_page = start + len(batch)
+                    for text in batch:
+                        yield text
+                        produced += len(text)
+                        if produced >= max_chars:
+                            return
+            return
+        except BrokenProcessPool:
+            if retried:
+                raise
+            retried = True
+
+
+async def iter_document_text(path: str, max_chars: int = DOC_EXTRACT_MAX_CHARS, outcome: dict = None):
+    """
+    Yield the text of a spooled document. The format is sniffed from its
+    magic bytes and the file is parsed once, by the backend for that
+    format: PDF page by page, other formats whole. Unsupported formats
+    (legacy .doc, other archives, binaries) yield nothing, and a damaged
+    file ends the text where parsing failed. Configuration errors (an
+    unknown or missing PDF backend) and INFRASTRUCTURE_ERRORS are raised,
+    not mistaken for a damaged file.
+
+    If outcome is given, outcome["complete"] is set to True only when the
+    whole document (up to max_chars) was parsed without error.
+    """
+    outcome = outcome if outcome is not None else {}
+    outcome["complete"] = False
+    file_format = await asyncio.to_thread(detect_file_format, path)
+
+    if file_format == PDF:
+        backend = resolve_pdf_backend()
+        try:
+            async for text in iter_pdf_pages(path, max_chars, backend):
+                yield text
+        except INFRASTRUCTURE_ERRORS:
+            raise
+        except Exception:
+            return   # damaged file: keep whatever text was read
+        outcome["complete"] = True
+    elif file_format in FILE_BACKENDS:
+        try:
+            text = await asyncio.to_thread(FILE_BACKENDS[file_format], path)
+        except INFRASTRUCTURE_ERRORS:
+            raise
+        except Exception:
+            return
+        outcome["complete"] = True
+        yield text[:max_chars]
+
+
+async def extract_document_text(path: str) -> str:
+    return "\n".join([text async for text in iter_document_text(path)])
+
+
+def file_sha256(path: str) -> str:
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def extraction_settings() -> str:
+    """Settings that change extracted document text, for cache keys."""
+    return f"{resolve_pdf_backend()}:{DOC_EXTRACT_MAX_CHARS}:lines"
+
+
+def document_cache_key(sha256: str) -> str:
+    # Same bytes, same extraction settings -> same text
+    return f"{sha256}:{extraction_settings()}"
+
+
+async def get_document_text(path: str, sha256: str = None) -> dict:
+    """
+    Cleaned text of a spooled document, through the content-addressed cache.
+    Line breaks are kept (clean_lines) so section headings can be found.
+
+    Returns {"text", "page_offsets", "sha256", "cached"}: page_offsets[i]
+    is the character offset in text where page i starts (a single entry
+    for non-paged formats). A re-uploaded document is never parsed again.
+    Raises DocumentExtractionError when no text could be extracted.
+    """
+    sha256 = sha256 or await asyncio.to_thread(file_sha256, path)
+    key = document_cache_key(sha256)
+
+    if DOC_TEXT_CACHE_ENABLED:
+        cached = await asyncio.to_thread(document_text_cache.get, key)
+        if cached is not None:
+            return {**cached, "sha256": sha256, "cached": True}
+
+    parts, page_offsets, position = [], [], 0
+    outcome = {}
+    async for page in iter_document_text(path, outcome=outcome):
+        cleaned = clean_lines(page)
+        if parts and cleaned:
+            position += 1   # the joining newline
+        page_offsets.append(position)
+        if cleaned:
+            parts.append(cleaned)
+            position += len(cleaned)
+    text = "\n".join(parts)
+
+    if not text:
+        raise DocumentExtractionError("No text could be extracted from the document")
+
+    # Entries never expire: a partial read (damaged or interrupted) is not cached
+    if DOC_TEXT_CACHE_ENABLED and outcome["complete"]:
+        await asyncio.to_thread(document_text_cache.set, key, text, page_offsets)
+    return {"text": text, "page_offsets": page_offsets, "sha256": sha256, "cached": False}
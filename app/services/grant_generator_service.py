@@ -1,12 +1,12 @@
 import json
 import re
 import uuid
-from openai import AsyncOpenAI
-from app.config import OPENAI_API_KEY
-from app.data.org_store import get_organization_analysis, save_organization_analysis
+from app.data.org_store import get_organization_analysis, save_organization_analysis, InvalidSessionError
 from app.services.grant_api_service import fetch_sample_grants
-
-client = AsyncOpenAI(api_key=OPENAI_API_KEY)
+from app.services.llm_client import chat_completion
+from app.utils.context_packer import pack_context
+from app.utils.prompt_prefix import shared_prefix
+from app.services.single_flight import coalesce
 
 PROMPT = """
 You are a professional grant strategist.
@@ -69,6 +69,7 @@ def normalize_grant_output(raw_output: dict, org_session_id: str) -> list:
 
 
 
+@coalesce("generate_top_grants")
 async def generate_top_grants(session_id: str, sample_grants: list = None, top_n: int = 3) -> list:
     """
     Generate top N grant opportunities with their own session IDs
@@ -77,7 +78,7 @@ async def generate_top_grants(session_id: str, sample_grants: list = None, top_n
     # Load organization profile
     org_data = get_organization_analysis(session_id)
     if not org_data:
-        raise ValueError("Invalid session_id")
+        raise InvalidSessionError("Invalid session_id")
 
     org_profile = org_data["analysis"].get("generated_output", {})
 
@@ -88,24 +89,23 @@ async def generate_top_grants(session_id: str, sample_grants: list = None, top_n
     # Only take top_n sample grants for AI context
     payload = f"""
 ORGANIZATION PROFILE:
-{json.dumps(org_profile, indent=2)}
+{pack_context(org_profile, "grant_generation")}
 
 SAMPLE GRANTS:
-{json.dumps(sample_grants[:top_n], indent=2)}
+{json.dumps(sample_grants[:top_n], indent=2, sort_keys=True)}
 """
 
     # Call AI
-    response = await client.chat.completions.create(
+    raw = await chat_completion(
         model="gpt-4o-mini",
         messages=[
-            {"role": "system", "content": "Return JSON only, no explanations."},
-            {"role": "user", "content": PROMPT + payload}
+            shared_prefix("Return JSON only, no explanations.", PROMPT),
+            {"role": "user", "content": payload}
         ],
         temperature=0.3
     )
 
-    raw = response.choices[0].message.content.strip()
-    cleaned = re.sub(r"```json|```", "", raw).strip()
+    cleaned = re.sub(r"```json|```", "", raw.strip()).strip()
     raw_output = json.loads(cleaned)
 
     # Normalize output and assign session_id
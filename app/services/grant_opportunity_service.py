@@ -1,22 +1,41 @@
 # app/services/grant_opportunity_service.py
-from openai import OpenAI
-from app.config import OPENAI_API_KEY
+from app.services.llm_client import chat_completion, chat_completion_reply
+from app.utils.context_packer import pack_context
+from app.utils.prompt_prefix import shared_prefix
+from app.utils.text_clean import clean_text, clean_lines
+from app.services.http_cache import fetch_text
+from app.utils.html_extract import extract_html, resolve_backend as resolve_html_backend
+from app.services.upload_spool import spool_bytes
+from app.services.document_extract import get_document_text, extraction_settings, DocumentExtractionError
+from app.utils.file_format import detect_format, PDF, DOCX, HTML, TEXT
+from app.services.cascade import get_cascade, maybe_audit
+from app.services.single_flight import single_flight
+from app.rag.rfp_filter import select_relevant_text
+from app.config import (
+    LLM_ROUTING,
+    GRANT_ANALYSIS_MEMO_ENABLED,
+    RFP_PREFILTER_ENABLED,
+    RFP_PREFILTER_TOKENS,
+    CASCADE_ENABLED,
+    CASCADE_SMALL_MODEL,
+    CASCADE_MIN_CONFIDENCE,
+    CASCADE_GRANT_STRONG_SIGNALS
+)
 from app.schemas.grant_opportunity import GrantOpportunityAnalysis, GrantOpportunityDetails
-from app.data.org_store import get_organization_analysis, save_organization_analysis
-
-import requests
+from app.data.org_store import get_organization_analysis, save_session_reference, InvalidSessionError
+from app.data.grant_store import (
+    profile_fingerprint,
+    grant_analysis_key,
+    get_grant_analysis,
+    save_grant_analysis
+)
+
+import asyncio
+import hashlib
 import json
 import uuid
-import io
-import pdfplumber
-from docx import Document
-from bs4 import BeautifulSoup
-import openai
 import re
 
-# Set your OpenAI API key
-client = OpenAI(api_key=OPENAI_API_KEY)
-
 TGCI_GRANT_ANALYSIS_PROMPT = """
 You are a TGCI-trained grants evaluator.
 
@@ -88,38 +107,107 @@ ADDITIONAL CONSTRAINTS:
 """
 
 
+# STEP 1 of the analysis on its own, for the small model of the cascade
+GRANT_DETECTION_PROMPT = """
+Decide whether the provided text represents a REAL GRANT OPPORTUNITY,
+RFP, funding call, or application notice. Funding, eligibility, deadlines
+or application steps may be explicit or clearly implied. Text that is
+ONLY informational, promotional, or unrelated to funding is NOT a grant
+opportunity.
 
-def clean_text(text: str) -> str:
-    """Remove excessive line breaks, multiple spaces, non-ASCII chars"""
-    text = re.sub(r'\n+', '\n', text)
-    text = re.sub(r'\s+', ' ', text)
-    return text.strip()
+Return JSON ONLY:
+{"is_grant_opportunity": true | false, "confidence": 0.0-1.0}
+"""
 
+# Vocabulary of funding calls, used by the local first-pass classifier
+GRANT_SIGNAL_PATTERNS = [
+    r"\bgrants?\b", r"\brfp\b", r"request for (proposals|applications)",
+    r"funding (opportunity|announcement|call|available)", r"\bfund(s|ing|ed)?\b",
+    r"\beligib(le|ility)\b", r"\bdeadline\b", r"\bapply\b", r"\bapplica(tion|nts?)\b",
+    r"letter of (intent|inquiry)", r"\baward(s|ed)?\b", r"\bproposals?\b",
+    r"\bsubmi(t|ssion)\b", r"\bbudget\b", r"501\(c\)\(3\)", r"\bfunders?\b",
+    r"\bfoundation\b", r"\bgrantees?\b",
+]
+_GRANT_SIGNAL_RE = [re.compile(p, re.IGNORECASE) for p in GRANT_SIGNAL_PATTERNS]
+
+GRANT_ANALYSIS_MODEL = "gpt-5"
+GRANT_ANALYSIS_ROUTE = "grant_analysis"
+# answered_by of analyses decided by the cascade without the analysis model
+CASCADE_VERDICT = "cascade"
+
+# Part of the memo key: editing a prompt, changing the model or its
+# routing (fallbacks, timeouts) or the RFP pre-filter retires old analyses
+GRANT_ANALYSIS_PROMPT_VERSION = hashlib.sha256(
+    json.dumps([
+        TGCI_GRANT_ANALYSIS_PROMPT, GRANT_DETECTION_PROMPT,
+        GRANT_ANALYSIS_MODEL, LLM_ROUTING.get(GRANT_ANALYSIS_ROUTE), CASCADE_SMALL_MODEL,
+        RFP_PREFILTER_ENABLED, RFP_PREFILTER_TOKENS
+    ], sort_keys=True).encode("utf-8")
+).hexdigest()[:16]
+
+grant_detection_cascade = get_cascade("grant_detection")
+
+
+def count_grant_signals(text: str) -> int:
+    """Number of distinct funding-call patterns present in the text."""
+    return sum(1 for pattern in _GRANT_SIGNAL_RE if pattern.search(text))
+
+
+async def detect_grant_opportunity(opportunity_text: str):
+    """
+    Cheap first pass of STEP 1 (grant detection).
+    Returns False when the text is confidently NOT a grant opportunity,
+    True when it confidently is, and None when gpt-5 must decide.
+    """
+    # Only empty text is rejected unseen: the signal patterns are English,
+    # so text without any of them (other languages included) goes to the
+    # small model
+    if not opportunity_text.strip():
+        grant_detection_cascade.record("decided_by_heuristic", saved_large_call=True)
+        return False
+    if count_grant_signals(opportunity_text) >= CASCADE_GRANT_STRONG_SIGNALS:
+        grant_detection_cascade.record("decided_by_heuristic")
+        return True
 
-def extract_text_from_file(file_bytes: bytes) -> str:
-    """Extract text from PDF or DOCX files"""
-    # PDF
     try:
-        with pdfplumber.open(io.BytesIO(file_bytes)) as pdf:
-            text = "".join([page.extract_text() or "" for page in pdf.pages])
-        if text.strip():
-            return text
+        content = await chat_completion(
+            model=CASCADE_SMALL_MODEL,
+            messages=[
+                shared_prefix(GRANT_DETECTION_PROMPT),
+                {"role": "user", "content": pack_context({"grant_opportunity": opportunity_text}, "grant_analysis")}
+            ],
+            temperature=0
+        )
+        verdict = json.loads(content)
+        confidence = float(verdict.get("confidence", 0))
     except Exception:
-        pass
+        return None
 
-    # DOCX
-    try:
-        doc = Document(io.BytesIO(file_bytes))
-        text = "\n".join([p.text for p in doc.paragraphs if p.text.strip()])
-        if text.strip():
-            return text
-    except Exception:
-        pass
+    if confidence >= CASCADE_MIN_CONFIDENCE:
+        is_grant = bool(verdict.get("is_grant_opportunity"))
+        grant_detection_cascade.record("decided_by_small_model", saved_large_call=not is_grant)
+        return is_grant
+    return None
 
-    return ""
+
+def not_aligned_output() -> dict:
+    """Analysis for text that is not a grant opportunity (see STATUS RULES)."""
+    return {
+        "key_strengths": "",
+        "areas_for_improvement": "",
+        "extracted_details": {
+            "funder_name": "",
+            "focus_area": "",
+            "deadline": "",
+            "eligibility": "",
+            "attachment_required": "",
+            "application_format": ""
+        },
+        "status": "NOT_ALIGNED"
+    }
 
 
-def get_text_from_url(url: str) -> str:
+async def get_text_from_url(url: str) -> str:
     """
     Download content from a URL and return text.
     Handles PDF, DOCX, Google Docs (export as PDF), or public web page text.
@@ -130,89 +218,109 @@ def get_text_from_url(url: str) -> str:
             if not url.endswith("/export?format=pdf"):
                 url = url.replace("/edit", "/export?format=pdf")
 
-        resp = requests.get(url, timeout=15)
-        resp.raise_for_status()
-        content_type = resp.headers.get("Content-Type", "").lower()
+        async def _extract(resp):
+            # The body's magic bytes decide the format; Content-Type and the
+            # URL suffix are often wrong (octet-stream PDFs, .aspx pages...)
+            file_format = detect_format(resp.content)
 
-        # PDF
-        if "pdf" in content_type or url.lower().endswith(".pdf"):
-            return extract_text_from_file(resp.content)
+            # PDF / Word: spooled to disk, pages extracted in the process pool
+            if file_format in (PDF, DOCX):
+                spooled = await asyncio.to_thread(spool_bytes, resp.content)
+                document = await get_document_text(spooled["path"], spooled["sha256"])
+                return document["text"]
 
-        # Word
-        elif "word" in content_type or url.lower().endswith((".docx", ".doc")):
-            return extract_text_from_file(resp.content)
+            # HTML page
+            elif file_format == HTML or (file_format == TEXT and "html" in resp.content_type):
+                page = await asyncio.to_thread(extract_html, resp.text)
+                return page["text"]
 
-        # Fallback: HTML page
-        elif "html" in content_type or url.lower().endswith(".html"):
-            soup = BeautifulSoup(resp.text, "html.parser")
-            texts = [t.get_text(separator=" ", strip=True) for t in soup.find_all(['p','h1','h2','h3','li'])]
-            return "\n".join(texts)
+            elif file_format == TEXT:
+                return resp.text
 
-        else:
-            return resp.text
+            return ""
+
+        # Unchanged documents are served from the cache without re-parsing
+        kind = f"rfp:{resolve_html_backend()}:{extraction_settings()}"
+        return await fetch_text(url, kind, _extract)
 
     except Exception:
         return f"Grant opportunity reference: {url}"
 
 
 def create_combined_session(org_session_id: str, grant_analysis: dict) -> str:
-    """Save combined organization + grant analysis into org_store"""
-    org_data = get_organization_analysis(org_session_id)
-    if not org_data:
-        raise ValueError("Invalid org session")
+    """Save combined organization + grant analysis as a reference to the org session"""
+    if not get_organization_analysis(org_session_id):
+        raise InvalidSessionError("Invalid org session")
 
     new_session_id = str(uuid.uuid4())
 
-    combined_payload = {
-        "organization": org_data,
-        "grant": grant_analysis
-    }
-
-    save_organization_analysis(
+    save_session_reference(
         new_session_id,
+        parent_key=org_session_id,
         payload={"source": "UPLOADED_GRANT"},
-        analysis=combined_payload
+        delta={"grant": grant_analysis}
     )
 
     return new_session_id
 
 
-def analyze_grant_opportunity(input_data, session_id: str):
+async def run_grant_analysis(org_data: dict, opportunity_text: str):
     """
-    Main function to analyze grant opportunity.
-    Supports PDF/Word files, Google Docs URLs, public webpages, or plain text.
+    Full three-step TGCI analysis (detection, normalization, alignment) on gpt-5.
+    Returns (analysis, answered_by): answered_by is the model that wrote a
+    complete answer (a fallback when gpt-5 timed out), None if truncated.
     """
-    # 1. Load organization profile
-    org_data = get_organization_analysis(session_id)
-    if not org_data:
-        raise ValueError("Invalid or expired session_id")
-
-    # 2. Prepare grant opportunity text
-    if getattr(input_data, "rfp_file", None):
-        opportunity_text = clean_text(extract_text_from_file(input_data.rfp_file))
-    elif getattr(input_data, "opportunity_url", None):
-        opportunity_text = clean_text(get_text_from_url(input_data.opportunity_url))
-    else:
-        opportunity_text = clean_text(getattr(input_data, "opportunity_text", ""))
-
-    # 3. Build context for LLM
     context = {
         "organization": org_data,
         "grant_opportunity": opportunity_text
     }
 
-    # 4. Call OpenAI
-    ai_response = client.chat.completions.create(
-        model="gpt-5",
+    reply = await chat_completion_reply(
+        model=GRANT_ANALYSIS_MODEL,
         messages=[
-            {"role": "system", "content": TGCI_GRANT_ANALYSIS_PROMPT},
-            {"role": "user", "content": json.dumps(context, indent=2, default=str)}
-        ]
-        
+            shared_prefix(TGCI_GRANT_ANALYSIS_PROMPT),
+            {"role": "user", "content": pack_context(context, "grant_analysis")}
+        ],
+        route=GRANT_ANALYSIS_ROUTE
     )
 
-    raw_output = json.loads(ai_response.choices[0].message.content)
+    answered_by = reply["model"] if reply["finish_reason"] == "stop" else None
+    return json.loads(reply["content"]), answered_by
+
+
+async def analyze_opportunity_text(org_data: dict, opportunity_text: str):
+    """
+    Cascade + TGCI analysis of one RFP text (clean_lines output) for one
+    organization. Returns (analysis, answered_by) as run_grant_analysis does;
+    answered_by is CASCADE_VERDICT when the cascade rejected the text.
+    """
+    # Long RFPs are cut down to their relevant sections, locally, first;
+    # the filter needs the line breaks to find headings, the models do not
+    if RFP_PREFILTER_ENABLED:
+        opportunity_text = await asyncio.to_thread(select_relevant_text, opportunity_text, org_data)
+    else:
+        opportunity_text = clean_text(opportunity_text)
+
+    # Cheap grant detection; non-grant text never reaches gpt-5
+    is_grant = await detect_grant_opportunity(opportunity_text) if CASCADE_ENABLED else None
 
+    if is_grant is False:
+        raw_output = not_aligned_output()
+
+        answered_by = CASCADE_VERDICT
+
+        async def _audit():
+            full, _ = await run_grant_analysis(org_data, opportunity_text)
+            return full.get("status") == "NOT_ALIGNED"
+
+        maybe_audit(grant_detection_cascade, _audit)
+    else:
+        # Full TGCI analysis on gpt-5
+        raw_output, answered_by = await run_grant_analysis(org_data, opportunity_text)
+        if is_grant is None and CASCADE_ENABLED:
+            grant_detection_cascade.record("escalated")
+        elif is_grant:
+            grant_detection_cascade.record_agreement(raw_output.get("status") != "NOT_ALIGNED")
 
     details = GrantOpportunityDetails(**raw_output.get("extracted_details", {}))
     analysis = GrantOpportunityAnalysis(
@@ -222,14 +330,59 @@ def analyze_grant_opportunity(input_data, session_id: str):
         status=raw_output.get("status")
     )
 
+    return analysis.dict(), answered_by
+
+
+async def analyze_grant_opportunity(input_data, session_id: str):
+    """
+    Main function to analyze grant opportunity.
+    Supports PDF/Word files, Google Docs URLs, public webpages, or plain text.
+    """
+    # 1. Load organization profile
+    org_data = get_organization_analysis(session_id)
+    if not org_data:
+        raise InvalidSessionError("Invalid or expired session_id")
+
+    # 2. Prepare grant opportunity text (parsing stays off the event loop)
+    if getattr(input_data, "rfp_file_path", None):
+        # Cached by content hash: a re-uploaded RFP is not parsed again
+        document = await get_document_text(input_data.rfp_file_path, input_data.rfp_file_sha256)
+        opportunity_text = document["text"]
+    elif getattr(input_data, "opportunity_url", None):
+        opportunity_text = clean_lines(await get_text_from_url(input_data.opportunity_url))
+    else:
+        opportunity_text = clean_lines(getattr(input_data, "opportunity_text", None) or "")
+
+    # Empty text is an extraction failure, not a verdict worth memoizing
+    if not opportunity_text.strip():
+        raise DocumentExtractionError("No grant opportunity text to analyze")
+
+    # 3. Memoized per (org profile, RFP text, prompt version); concurrent
+    # identical requests share one analysis
+    key = grant_analysis_key(profile_fingerprint(org_data), clean_text(opportunity_text), GRANT_ANALYSIS_PROMPT_VERSION)
+    memo = get_grant_analysis(key) if GRANT_ANALYSIS_MEMO_ENABLED else None
+
+    if memo:
+        analysis = memo["analysis"]
+    else:
+        async def _analyze():
+            result, answered_by = await analyze_opportunity_text(org_data, opportunity_text)
+            # Like the LLM cache: only complete answers of the intended model
+            # are kept; a fallback's degraded analysis is not memoized
+            if GRANT_ANALYSIS_MEMO_ENABLED and answered_by in (GRANT_ANALYSIS_MODEL, CASCADE_VERDICT):
+                save_grant_analysis(key, result)
+            return result
+
+        analysis = await single_flight("grant_analysis:" + key, _analyze)
+
     new_session_id = create_combined_session(
         org_session_id=session_id,
-        grant_analysis=analysis.dict()
+        grant_analysis=analysis
     )
 
     return {
         "combined_session_id": new_session_id,
-        "analysis": analysis.dict()
+        "analysis": analysis
     }
 
 
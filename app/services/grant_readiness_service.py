@@ -4,8 +4,8 @@ from app.data.org_store import save_organization_analysis
 import uuid
 
 
-def analyze_with_website(payload):
-    scraped_text = scrape_website(payload.url)
+async def analyze_with_website(payload):
+    scraped_text = await scrape_website(payload.url)
 
     context = {
         "scenario": "WITH_WEBSITE",
@@ -15,7 +15,7 @@ def analyze_with_website(payload):
         "website_content": scraped_text
     }
     
-    result = run_ai_analysis(context)
+    result = await run_ai_analysis(context)
     
     # Generate a session UUID
     session_id = str(uuid.uuid4())
@@ -27,7 +27,7 @@ def analyze_with_website(payload):
     return result
 
 
-def analyze_without_website(payload):
+async def analyze_without_website(payload):
     context = {
         "scenario": "WITHOUT_WEBSITE",
         "mission": payload.mission,
@@ -35,7 +35,7 @@ def analyze_without_website(payload):
         "type_of_work": payload.type_of_work,
         "goals_aspirations": payload.goals_aspirations
     }
-    result = run_ai_analysis(context)
+    result = await run_ai_analysis(context)
 
     # Generate a session UUID
     session_id = str(uuid.uuid4())
@@ -0,0 +1,221 @@
+# app/services/http_cache.py
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from app.config import (
+    HTTP_CACHE_ENABLED,
+    HTTP_CACHE_MAX_AGE_SECONDS,
+    HTTP_CACHE_TTL_SECONDS,
+    HTTP_CACHE_MAX_BYTES,
+    HTTP_CACHE_DB_PATH,
+    HTTP_MAX_DOWNLOAD_BYTES
+)
+from app.services.http_fetch import fetch, FetchError, TEXT_TYPES
+
+
+class HTTPTextCache:
+    """
+    SQLite cache of text extracted from a URL, with the validators
+    (ETag / Last-Modified) of the response it came from.
+
+    Entries are fresh for max_age_seconds and then revalidated with a
+    conditional GET; they are dropped after ttl_seconds and evicted by
+    total size (least recently used first).
+    """
+
+    def __init__(self, db_path: str, max_age_seconds: int, ttl_seconds: int, max_bytes: int):
+        self.db_path = db_path
+        self.max_age_seconds = max_age_seconds
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        self._conn = None
+        self._conn_pid = None
+        self._counters = {
+            "fresh_hits": 0,
+            "revalidated": 0,
+            "misses": 0,
+            "stale_served": 0,
+            "writes": 0,
+            "expired": 0,
+            "evictions": 0
+        }
+
+    def _connect(self):
+        # The SQLite file is shared by all workers; each process opens its own connection
+        if self._conn is None or self._conn_pid != os.getpid():
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS http_cache (
+                    key TEXT PRIMARY KEY,
+                    text TEXT NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    size INTEGER NOT NULL,
+                    fresh_until REAL NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_http_cache_access ON http_cache(last_access)")
+            self._conn = conn
+            self._conn_pid = os.getpid()
+        return self._conn
+
+    def get(self, key: str):
+        """The entry for key as a dict (text, etag, last_modified, fresh), or None."""
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT text, etag, last_modified, fresh_until, expires_at FROM http_cache WHERE key = ?",
+                (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            text, etag, last_modified, fresh_until, expires_at = row
+            if expires_at <= now:
+                with conn:
+                    conn.execute("DELETE FROM http_cache WHERE key = ?", (key,))
+                self._counters["expired"] += 1
+                return None
+
+            with conn:
+                conn.execute("UPDATE http_cache SET last_access = ? WHERE key = ?", (now, key))
+            return {
+                "text": text,
+                "etag": etag,
+                "last_modified": last_modified,
+                "fresh": fresh_until > now
+            }
+
+    def set(self, key: str, text: str, etag: str = None, last_modified: str = None):
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO http_cache "
+                    "(key, text, etag, last_modified, size, fresh_until, expires_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        key, text, etag, last_modified, len(text.encode("utf-8")),
+                        now + self.max_age_seconds, now + self.ttl_seconds, now
+                    )
+                )
+            self._counters["writes"] += 1
+            self._evict(conn, now)
+
+    def refresh(self, key: str):
+        """The origin confirmed the entry (304): start a new freshness period."""
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "UPDATE http_cache SET fresh_until = ?, expires_at = ?, last_access = ? WHERE key = ?",
+                    (now + self.max_age_seconds, now + self.ttl_seconds, now, key)
+                )
+
+    def record(self, counter: str):
+        with self._lock:
+            self._counters[counter] += 1
+
+    def _evict(self, conn, now: float):
+        with conn:
+            expired = conn.execute("DELETE FROM http_cache WHERE expires_at <= ?", (now,)).rowcount
+            self._counters["expired"] += max(expired, 0)
+
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM http_cache").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+
+            for key, size in conn.execute(
+                "SELECT key, size FROM http_cache ORDER BY last_access ASC"
+            ).fetchall():
+                if total <= self.max_bytes:
+                    break
+                conn.execute("DELETE FROM http_cache WHERE key = ?", (key,))
+                total -= size
+                self._counters["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute("DELETE FROM http_cache")
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._counters)
+        hits = stats["fresh_hits"] + stats["revalidated"]
+        lookups = hits + stats["misses"]
+        stats["hit_rate"] = round(hits / lookups, 4) if lookups else 0.0
+        return stats
+
+
+http_text_cache = HTTPTextCache(
+    db_path=HTTP_CACHE_DB_PATH,
+    max_age_seconds=HTTP_CACHE_MAX_AGE_SECONDS,
+    ttl_seconds=HTTP_CACHE_TTL_SECONDS,
+    max_bytes=HTTP_CACHE_MAX_BYTES
+)
+
+
+async def fetch_text(url: str, kind: str, extract, allowed_types=TEXT_TYPES,
+                     max_bytes: int = HTTP_MAX_DOWNLOAD_BYTES) -> str:
+    """
+    Text of a URL through the cache.
+
+    extract is an async callable turning a FetchResult into text; kind
+    names the extraction, including the backends it uses, so the same URL
+    is cached per extractor and a backend change is never served old text.
+    A fresh entry is returned without any request; a stale one is
+    revalidated with If-None-Match / If-Modified-Since, and a 304 reuses
+    the stored text without parsing. If the origin is unreachable, a
+    stale entry is served rather than nothing.
+    """
+    if not HTTP_CACHE_ENABLED:
+        return await extract(await fetch(url, allowed_types=allowed_types, max_bytes=max_bytes))
+
+    key = f"{kind}:{url}"
+    cache = http_text_cache
+    entry = await asyncio.to_thread(cache.get, key)
+    if entry and entry["fresh"]:
+        cache.record("fresh_hits")
+        return entry["text"]
+
+    headers = {}
+    if entry and entry["etag"]:
+        headers["If-None-Match"] = entry["etag"]
+    if entry and entry["last_modified"]:
+        headers["If-Modified-Since"] = entry["last_modified"]
+
+    try:
+        resp = await fetch(url, allowed_types=allowed_types, max_bytes=max_bytes, headers=headers or None)
+    except FetchError:
+        if entry:
+            cache.record("stale_served")
+            return entry["text"]
+        raise
+
+    if resp.status_code == 304 and entry:
+        cache.record("revalidated")
+        await asyncio.to_thread(cache.refresh, key)
+        return entry["text"]
+
+    cache.record("misses")
+    text = await extract(resp)
+    if text and "no-store" not in resp.headers.get("cache-control", "").lower():
+        await asyncio.to_thread(
+            cache.set, key, text, resp.headers.get("etag"), resp.headers.get("last-modified")
+        )
+    return text
@@ -0,0 +1,164 @@
+# app/services/http_fetch.py
+import asyncio
+from contextlib import asynccontextmanager
+import httpx
+from app.config import (
+    HTTP_TIMEOUT_SECONDS,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_CONNECTIONS_PER_HOST,
+    HTTP_MAX_DOWNLOAD_BYTES,
+    HTTP_USER_AGENT
+)
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Content types we can extract text from
+HTML_TYPES = ("text/html", "application/xhtml+xml")
+DOCUMENT_TYPES = (
+    "application/pdf",
+    "application/msword",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "application/octet-stream",
+)
+TEXT_TYPES = HTML_TYPES + DOCUMENT_TYPES + ("text/plain",)
+
+_client = None
+_host_semaphores = {}   # host -> [semaphore, requests using it]
+
+_fetch_counters = {
+    "requests": 0,
+    "errors": 0,
+    "rejected_content_type": 0,
+    "rejected_too_large": 0,
+    "bytes_downloaded": 0
+}
+
+
+class FetchError(ValueError):
+    """A URL could not be fetched or its response was rejected."""
+
+
+class FetchResult:
+    def __init__(self, url: str, status_code: int, headers: httpx.Headers, content: bytes,
+                 encoding: str = None):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.encoding = encoding
+
+    @property
+    def content_type(self) -> str:
+        return self.headers.get("content-type", "").split(";")[0].strip().lower()
+
+    @property
+    def text(self) -> str:
+        try:
+            return self.content.decode(self.encoding or "utf-8", errors="replace")
+        except LookupError:  # unknown charset name
+            return self.content.decode("utf-8", errors="replace")
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    The one outbound AsyncClient of this process: keep-alive pool,
+    HTTP/2 when h2 is installed, redirects followed.
+    """
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            timeout=HTTP_TIMEOUT_SECONDS,
+            follow_redirects=True,
+            headers={"User-Agent": HTTP_USER_AGENT},
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_CONNECTIONS
+            )
+        )
+    return _client
+
+
+async def close_http_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+@asynccontextmanager
+async def _host_slot(url: str):
+    # httpx parses the URL as the request will: malformed ones raise InvalidURL
+    host = httpx.URL(url).netloc.decode("ascii").lower()
+    entry = _host_semaphores.get(host)
+    if entry is None:
+        entry = _host_semaphores[host] = [asyncio.Semaphore(HTTP_MAX_CONNECTIONS_PER_HOST), 0]
+    entry[1] += 1
+    try:
+        async with entry[0]:
+            yield
+    finally:
+        # Only hosts with requests in flight or waiting keep an entry
+        entry[1] -= 1
+        if entry[1] == 0:
+            del _host_semaphores[host]
+
+
+def _type_allowed(content_type: str, allowed_types) -> bool:
+    # Servers that send no content type get the benefit of the doubt
+    return not allowed_types or not content_type or content_type in allowed_types
+
+
+async def fetch(url: str, allowed_types=TEXT_TYPES, max_bytes: int = HTTP_MAX_DOWNLOAD_BYTES,
+                headers: dict = None) -> FetchResult:
+    """
+    GET a URL with a streamed body.
+
+    The response is rejected before its body is read when the content
+    type is not in allowed_types or the declared length exceeds max_bytes,
+    and the download is aborted as soon as it grows past max_bytes.
+    Raises FetchError on any failure or non-2xx/304 status.
+    """
+    _fetch_counters["requests"] += 1
+    try:
+        async with _host_slot(url):
+            async with get_http_client().stream("GET", url, headers=headers) as resp:
+                if resp.status_code != 304:
+                    resp.raise_for_status()
+
+                content_type = resp.headers.get("content-type", "").split(";")[0].strip().lower()
+                if not _type_allowed(content_type, allowed_types):
+                    _fetch_counters["rejected_content_type"] += 1
+                    raise FetchError(f"Unsupported content type {content_type!r} for {url}")
+
+                declared = resp.headers.get("content-length")
+                if declared and declared.isdigit() and int(declared) > max_bytes:
+                    _fetch_counters["rejected_too_large"] += 1
+                    raise FetchError(f"{url} is larger than {max_bytes} bytes")
+
+                body = bytearray()
+                async for chunk in resp.aiter_bytes():
+                    body.extend(chunk)
+                    if len(body) > max_bytes:
+                        _fetch_counters["rejected_too_large"] += 1
+                        raise FetchError(f"{url} is larger than {max_bytes} bytes")
+
+                _fetch_counters["bytes_downloaded"] += len(body)
+                return FetchResult(
+                    str(resp.url), resp.status_code, resp.headers, bytes(body), resp.charset_encoding
+                )
+    except FetchError:
+        _fetch_counters["errors"] += 1
+        raise
+    except (httpx.HTTPError, httpx.InvalidURL) as exc:
+        # InvalidURL is not an HTTPError: a malformed URL must not become a 500
+        _fetch_counters["errors"] += 1
+        raise FetchError(f"Could not fetch {url}: {exc}") from exc
+
+
+def http_fetch_stats() -> dict:
+    return {"http2": HTTP2_AVAILABLE, **_fetch_counters}
@@ -0,0 +1,129 @@
+# app/services/job_queue.py
+import asyncio
+import itertools
+import uuid
+from datetime import datetime
+from app.config import (
+    JOB_WORKERS,
+    JOB_QUEUE_MAX_SIZE,
+    JOB_DEFAULT_PRIORITY,
+    JOB_MAX_PRIORITY,
+    JOB_RESULT_TTL_SECONDS
+)
+from app.data.session_store import create_session_store
+
+# Job records live in a session store so any worker process can answer a poll
+JOB_STORE = create_session_store("jobs", ttl_seconds=JOB_RESULT_TTL_SECONDS)
+
+# operation name -> async callable(**kwargs)
+JOB_HANDLERS = {}
+
+_queue = None
+_workers = []
+_sequence = itertools.count()   # FIFO order within one priority
+_counters = {"submitted": 0, "succeeded": 0, "failed": 0, "rejected": 0}
+
+
+class JobQueueFullError(RuntimeError):
+    pass
+
+
+def register_job_handler(operation: str, handler):
+    JOB_HANDLERS[operation] = handler
+
+
+def _now() -> str:
+    return datetime.utcnow().isoformat()
+
+
+def submit_job(operation: str, kwargs: dict, priority: int = JOB_DEFAULT_PRIORITY) -> dict:
+    """
+    Queue a registered operation and return its job record right away.
+    Lower priority values run first. Raises JobQueueFullError when the
+    pool is saturated.
+    """
+    if operation not in JOB_HANDLERS:
+        raise ValueError(f"Unknown job operation: {operation}")
+    if not 0 <= priority <= JOB_MAX_PRIORITY:
+        raise ValueError(f"Job priority must be between 0 and {JOB_MAX_PRIORITY}")
+    if _queue is None:
+        raise RuntimeError("Job workers are not running")
+
+    job_id = str(uuid.uuid4())
+    record = {
+        "job_id": job_id,
+        "operation": operation,
+        "status": "queued",
+        "priority": priority,
+        "created_at": _now(),
+        "started_at": None,
+        "finished_at": None,
+        "result": None,
+        "error": None
+    }
+
+    try:
+        _queue.put_nowait((priority, next(_sequence), job_id, operation, kwargs))
+    except asyncio.QueueFull:
+        _counters["rejected"] += 1
+        raise JobQueueFullError("Job queue is full, retry later")
+
+    JOB_STORE.set(job_id, record)
+    _counters["submitted"] += 1
+    return record
+
+
+def get_job(job_id: str):
+    return JOB_STORE.get(job_id)
+
+
+def _mark(job_id: str, **fields):
+    def _apply(record):
+        record = record or {"job_id": job_id}
+        record.update(fields)
+        return record
+    JOB_STORE.update(job_id, _apply)
+
+
+async def _worker():
+    while True:
+        _, _, job_id, operation, kwargs = await _queue.get()
+        try:
+            _mark(job_id, status="running", started_at=_now())
+            result = await JOB_HANDLERS[operation](**kwargs)
+            _mark(job_id, status="succeeded", result=result, finished_at=_now())
+            _counters["succeeded"] += 1
+        except asyncio.CancelledError:
+            _mark(job_id, status="failed", error="worker shut down", finished_at=_now())
+            raise
+        except Exception as exc:
+            _mark(job_id, status="failed", error=str(exc), finished_at=_now())
+            _counters["failed"] += 1
+        finally:
+            _queue.task_done()
+
+
+def start_job_workers(workers: int = JOB_WORKERS):
+    global _queue
+    if _queue is not None:
+        return
+
+    _queue = asyncio.PriorityQueue(maxsize=JOB_QUEUE_MAX_SIZE)
+    for _ in range(workers):
+        _workers.append(asyncio.create_task(_worker()))
+
+
+async def stop_job_workers():
+    global _queue
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
+    _queue = None
+
+
+def job_queue_stats() -> dict:
+    stats = dict(_counters)
+    stats["workers"] = len(_workers)
+    stats["queued"] = _queue.qsize() if _queue is not None else 0
+    return stats
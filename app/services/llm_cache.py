@@ -0,0 +1,184 @@
+# app/services/llm_cache.py
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from app.config import (
+    LLM_CACHE_TTL_SECONDS,
+    LLM_CACHE_MEMORY_ENTRIES,
+    LLM_CACHE_MAX_BYTES,
+    LLM_CACHE_DB_PATH
+)
+
+
+def cache_key(model: str, messages: list, params: dict) -> str:
+    """
+    Content address of a chat completion: SHA-256 over the canonical
+    JSON of model, messages and sampling parameters.
+    """
+    canonical = json.dumps(
+        {"model": model, "messages": messages, "params": params},
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+        default=str
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    Two-tier response cache: an in-memory LRU backed by a SQLite file.
+    Both tiers honour the TTL; the disk tier is evicted by total size
+    (least recently used first).
+    """
+
+    def __init__(self, db_path: str, ttl_seconds: int, memory_entries: int, max_bytes: int):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.memory_entries = memory_entries
+        self.max_bytes = max_bytes
+
+        self._memory = OrderedDict()   # key -> (value, expires_at)
+        self._lock = threading.Lock()
+        self._conn = None
+        self._conn_pid = None
+        self._counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "expired": 0,
+            "memory_evictions": 0,
+            "disk_evictions": 0
+        }
+
+    def _connect(self):
+        # The SQLite file is shared by all workers; each process opens its own connection
+        if self._conn is None or self._conn_pid != os.getpid():
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_access ON llm_cache(last_access)")
+            self._conn = conn
+            self._conn_pid = os.getpid()
+        return self._conn
+
+    def _remember(self, key: str, value: str, expires_at: float):
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+            self._counters["memory_evictions"] += 1
+
+    def get(self, key: str):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self._counters["memory_hits"] += 1
+                    return value
+                del self._memory[key]
+                self._counters["expired"] += 1
+
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self._counters["misses"] += 1
+                return None
+
+            value, expires_at = row
+            if expires_at <= now:
+                with conn:
+                    conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._counters["expired"] += 1
+                self._counters["misses"] += 1
+                return None
+
+            with conn:
+                conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+            self._remember(key, value, expires_at)
+            self._counters["disk_hits"] += 1
+            return value
+
+    def set(self, key: str, value: str):
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+        size = len(value.encode("utf-8"))
+
+        with self._lock:
+            self._remember(key, value, expires_at)
+
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, value, size, expires_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, value, size, expires_at, now)
+                )
+            self._counters["writes"] += 1
+            self._evict_disk(conn, now)
+
+    def _evict_disk(self, conn, now: float):
+        with conn:
+            expired = conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (now,)).rowcount
+            self._counters["expired"] += max(expired, 0)
+
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+
+            # Drop least recently used rows until the file is back under the cap
+            for key, size in conn.execute(
+                "SELECT key, size FROM llm_cache ORDER BY last_access ASC"
+            ).fetchall():
+                if total <= self.max_bytes:
+                    break
+                conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._memory.pop(key, None)
+                total -= size
+                self._counters["disk_evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            conn = self._connect()
+            with conn:
+                conn.execute("DELETE FROM llm_cache")
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._counters)
+            stats["memory_entries"] = len(self._memory)
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        lookups = hits + stats["misses"]
+        stats["hit_rate"] = round(hits / lookups, 4) if lookups else 0.0
+        return stats
+
+
+llm_cache = LLMCache(
+    db_path=LLM_CACHE_DB_PATH,
+    ttl_seconds=LLM_CACHE_TTL_SECONDS,
+    memory_entries=LLM_CACHE_MEMORY_ENTRIES,
+    max_bytes=LLM_CACHE_MAX_BYTES
+)
@@ -0,0 +1,330 @@
+# app/services/llm_client.py
+import asyncio
+import random
+import httpx
+from openai import (
+    AsyncOpenAI,
+    DefaultAsyncHttpxClient,
+    APIError,
+    RateLimitError,
+    APIConnectionError,
+    APITimeoutError,
+    InternalServerError
+)
+from app.config import (
+    OPENAI_API_KEY,
+    LLM_MAX_CONCURRENCY,
+    LLM_TIMEOUT_SECONDS,
+    LLM_CACHE_ENABLED,
+    LLM_DEFAULT_COMPLETION_TOKENS,
+    LLM_MAX_RETRIES,
+    LLM_KEEPALIVE_EXPIRY_SECONDS,
+    LLM_ROUTING,
+    LLM_HEDGE_MAX_RATIO
+)
+from app.services.llm_cache import llm_cache, cache_key
+from app.services.rate_limiter import get_rate_limiter
+from app.utils.context_packer import count_tokens
+from app.utils.deadline import remaining_time
+
+_client = None
+
+# Hard per-process cap; each model additionally has its own adaptive limit
+_llm_semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+
+_routing_counters = {
+    "routed_calls": 0,
+    "hedges_fired": 0,
+    "hedges_won": 0,
+    "fallbacks": 0,
+    "deadline_exceeded": 0
+}
+
+# Per model: prompt tokens sent and how many the provider served from its prefix cache
+_prompt_cache_counters = {}
+
+
+def get_openai_client() -> AsyncOpenAI:
+    """
+    The one AsyncOpenAI client of this process. The connection pool is
+    sized to the concurrency cap, so every admitted call gets a
+    keep-alive socket. SDK retries are off: 429s and transient errors are
+    retried here, in coordination with the rate limiter.
+    """
+    global _client
+    if _client is None:
+        _client = AsyncOpenAI(
+            api_key=OPENAI_API_KEY,
+            timeout=LLM_TIMEOUT_SECONDS,
+            max_retries=0,
+            http_client=DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=LLM_MAX_CONCURRENCY,
+                    max_keepalive_connections=LLM_MAX_CONCURRENCY,
+                    keepalive_expiry=LLM_KEEPALIVE_EXPIRY_SECONDS
+                )
+            )
+        )
+    return _client
+
+
+async def close_openai_client():
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
+
+
+def _estimate_tokens(messages: list, params: dict) -> int:
+    prompt = sum(count_tokens(m.get("content") or "") + 4 for m in messages)
+    completion = params.get("max_tokens") or params.get("max_completion_tokens") or LLM_DEFAULT_COMPLETION_TOKENS
+    return prompt + completion
+
+
+def _record_prompt_usage(model: str, usage):
+    if usage is None:
+        return
+    details = getattr(usage, "prompt_tokens_details", None)
+    counters = _prompt_cache_counters.setdefault(
+        model, {"calls": 0, "prompt_tokens": 0, "cached_tokens": 0}
+    )
+    counters["calls"] += 1
+    counters["prompt_tokens"] += usage.prompt_tokens or 0
+    counters["cached_tokens"] += (getattr(details, "cached_tokens", None) or 0) if details else 0
+
+
+def _retry_delay(exc: Exception, attempt: int) -> float:
+    response = getattr(exc, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(retry_after)
+    except (TypeError, ValueError):
+        return min(30.0, (2 ** attempt) + random.random())
+
+
+async def _create(model: str, messages: list, **params):
+    """
+    One chat completion call admitted by the model's rate limiter and
+    then the global cap, retried on 429 and transient server/connection
+    errors. Timeouts are not retried: another full-length attempt would
+    only repeat the wait. No retry starts past the request deadline.
+    """
+    limiter = get_rate_limiter(model)
+    estimated = _estimate_tokens(messages, params)
+
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        # Model slot first: calls waiting on a throttled model must not
+        # hold global permits that calls to healthy models could use
+        async with limiter.slot(estimated) as slot, _llm_semaphore:
+            try:
+                response = await get_openai_client().chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    **params
+                )
+            except RateLimitError as exc:
+                slot.throttled()
+                if attempt == LLM_MAX_RETRIES:
+                    raise
+                delay = _retry_delay(exc, attempt)
+            except APITimeoutError:
+                raise
+            except (APIConnectionError, InternalServerError) as exc:
+                if attempt == LLM_MAX_RETRIES:
+                    raise
+                delay = _retry_delay(exc, attempt)
+            else:
+                slot.record_usage(response.usage.total_tokens if response.usage else None)
+                _record_prompt_usage(model, response.usage)
+                return response
+
+        remaining = remaining_time()
+        if remaining is not None and delay >= remaining:
+            raise asyncio.TimeoutError("Request deadline leaves no time to retry the LLM call")
+
+        # Back off outside the slot so other calls can use it
+        await asyncio.sleep(delay)
+
+
+def _hedge_allowed() -> bool:
+    # Budget: hedges may add at most LLM_HEDGE_MAX_RATIO extra calls
+    return _routing_counters["hedges_fired"] < LLM_HEDGE_MAX_RATIO * _routing_counters["routed_calls"]
+
+
+async def _hedged(model: str, messages: list, hedge_after, **params):
+    """
+    Start one call; if it has not finished after hedge_after seconds,
+    start a duplicate and keep whichever succeeds first.
+    """
+    primary = asyncio.ensure_future(_create(model, messages, **params))
+    tasks = [primary]
+    try:
+        if not hedge_after:
+            return await primary
+
+        done, _ = await asyncio.wait({primary}, timeout=hedge_after)
+        if done or not _hedge_allowed():
+            return await primary
+
+        hedge = asyncio.ensure_future(_create(model, messages, **params))
+        tasks.append(hedge)
+        _routing_counters["hedges_fired"] += 1
+
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is hedge:
+                        _routing_counters["hedges_won"] += 1
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+
+async def _create_routed(model: str, messages: list, route: str, **params):
+    """
+    Run the call through the route's fallback chain. Each stage gets its
+    own timeout, clipped to what is left of the request deadline.
+    Returns (response, model_that_answered).
+    """
+    policy = LLM_ROUTING.get(route) if route else None
+    if not policy:
+        return await _create(model, messages, **params), model
+
+    _routing_counters["routed_calls"] += 1
+    chain = [model] + [m for m in policy.get("fallbacks", []) if m != model]
+    error = None
+
+    for stage, stage_model in enumerate(chain):
+        timeout = policy.get("stage_timeouts", {}).get(stage_model)
+        remaining = remaining_time()
+        if remaining is not None:
+            if remaining <= 0:
+                _routing_counters["deadline_exceeded"] += 1
+                break
+            timeout = min(timeout, remaining) if timeout else remaining
+
+        if stage > 0:
+            _routing_counters["fallbacks"] += 1
+
+        try:
+            response = await asyncio.wait_for(
+                _hedged(stage_model, messages, policy.get("hedge_after"), **params),
+                timeout
+            )
+            return response, stage_model
+        except (asyncio.TimeoutError, APIError) as exc:
+            error = exc
+
+    raise error or asyncio.TimeoutError("Request deadline exceeded before the LLM call")
+
+
+async def chat_completion_reply(model: str, messages: list, cache: bool = True, route: str = None,
+                                **params) -> dict:
+    """
+    chat_completion() that also says who answered and how:
+    {"content", "model" (the model that answered, a fallback on routed
+    calls), "finish_reason"}. Cache hits are complete answers of model.
+    """
+    use_cache = cache and LLM_CACHE_ENABLED
+    if use_cache:
+        key = cache_key(model, messages, params)
+        cached = await asyncio.to_thread(llm_cache.get, key)
+        if cached is not None:
+            return {"content": cached, "model": model, "finish_reason": "stop"}
+
+    response, answered_by = await _create_routed(model, messages, route, **params)
+
+    choice = response.choices[0]
+    content = choice.message.content
+
+    # Only complete answers from the requested model are worth replaying
+    if use_cache and content and choice.finish_reason == "stop" and answered_by == model:
+        await asyncio.to_thread(llm_cache.set, key, content)
+
+    return {"content": content, "model": answered_by, "finish_reason": choice.finish_reason}
+
+
+async def chat_completion(model: str, messages: list, cache: bool = True, route: str = None, **params) -> str:
+    """
+    Run a chat completion under the shared concurrency cap
+    and return the raw message content.
+
+    Identical (model, messages, params) calls are served from the
+    response cache; pass cache=False to always hit the API.
+    route names an LLM_ROUTING policy (hedging + fallback models).
+    """
+    reply = await chat_completion_reply(model, messages, cache=cache, route=route, **params)
+    return reply["content"]
+
+
+async def stream_chat_completion(model: str, messages: list, cache: bool = True, **params):
+    """
+    Stream a chat completion as content deltas.
+
+    A cache hit is replayed as a single chunk; a completed stream is
+    stored in the same cache as chat_completion().
+    """
+    use_cache = cache and LLM_CACHE_ENABLED
+    if use_cache:
+        key = cache_key(model, messages, params)
+        cached = await asyncio.to_thread(llm_cache.get, key)
+        if cached is not None:
+            yield cached
+            return
+
+    limiter = get_rate_limiter(model)
+    parts = []
+    finish_reason = None
+
+    # The slot is held for the whole stream. Streams are not retried:
+    # part of the answer may already have been sent to the client.
+    async with limiter.slot(_estimate_tokens(messages, params)) as slot, _llm_semaphore:
+        try:
+            stream = await get_openai_client().chat.completions.create(
+                model=model,
+                messages=messages,
+                stream=True,
+                stream_options={"include_usage": True},
+                **params
+            )
+        except RateLimitError:
+            slot.throttled()
+            raise
+        async for chunk in stream:
+            if chunk.usage:
+                slot.record_usage(chunk.usage.total_tokens)
+                _record_prompt_usage(model, chunk.usage)
+            if not chunk.choices:
+                continue
+            choice = chunk.choices[0]
+            if choice.finish_reason:
+                finish_reason = choice.finish_reason
+            if choice.delta.content:
+                parts.append(choice.delta.content)
+                yield choice.delta.content
+
+    content = "".join(parts)
+    if use_cache and content and finish_reason == "stop":
+        await asyncio.to_thread(llm_cache.set, key, content)
+
+
+def routing_stats() -> dict:
+    return dict(_routing_counters)
+
+
+def prompt_cache_stats() -> dict:
+    stats = {}
+    for model, counters in _prompt_cache_counters.items():
+        stats[model] = dict(counters)
+        stats[model]["cached_ratio"] = (
+            round(counters["cached_tokens"] / counters["prompt_tokens"], 4)
+            if counters["prompt_tokens"] else 0.0
+        )
+    return stats
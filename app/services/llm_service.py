@@ -1,12 +1,32 @@
-from openai import OpenAI
-from app.config import OPENAI_API_KEY
-from app.services.tgci_knowledge import load_tgci_knowledge
+from app.services.llm_client import chat_completion
+from app.services.tgci_knowledge import get_tgci_knowledge
+from app.utils.context_packer import pack_context
+from app.utils.prompt_prefix import shared_prefix, knowledge_block
+from app.services.single_flight import coalesce
+from app.services.cascade import get_cascade, maybe_audit
+from app.config import (
+    CASCADE_ENABLED,
+    CASCADE_SMALL_MODEL,
+    CASCADE_MIN_CONFIDENCE,
+    CASCADE_READINESS_BOUNDARIES,
+    CASCADE_BORDERLINE_MARGIN
+)
 import json
 
-client = OpenAI(api_key=OPENAI_API_KEY)
 
-tgci_knowledge = load_tgci_knowledge()
+# Role lines follow the TGCI knowledge, so both calls share that prefix
+PROFILE_ROLE = """
+You are a TGCI-trained grants professional.
+
+Use TGCI knowledge ONLY to structure content,
+never to invent facts.
+"""
 
+READINESS_ROLE = """
+You are a TGCI-trained grant readiness evaluator.
+
+Use TGCI knowledge ONLY to judge readiness.
+"""
 
 TGCI_ORG_PROFILE_PROMPT = """
 Extract and structure the organization's factual profile
@@ -69,8 +89,88 @@ Return JSON ONLY in the following format:
 }
 """
 
+# Appended to the readiness prompt for the small model of the cascade
+CASCADE_CONFIDENCE_INSTRUCTION = """
+Also include "confidence": a number from 0 to 1 stating how certain
+you are of the status. Use a low value whenever the evidence is thin
+or the organization sits between two statuses.
+"""
+
+readiness_cascade = get_cascade("readiness")
+
+
+def _normalize_status(readiness: dict) -> str:
+    status = str(readiness.get("status", "")).strip().upper()
+    if status not in ["GRANT_READY", "NEEDS_MINOR_IMPROVEMENTS", "NOT_READY"]:
+        status = "NEEDS_MINOR_IMPROVEMENTS"
+    return status
+
+
+def _is_confident_readiness(readiness: dict) -> bool:
+    """
+    Accept the small model's answer only when it is complete, confident
+    and not close to a status boundary.
+    """
+    if not all(key in readiness for key in ("status", "score", "gaps", "recommendations")):
+        return False
+    try:
+        confidence = float(readiness.get("confidence", 0))
+        score = float(readiness["score"])
+    except (TypeError, ValueError):
+        return False
+
+    if confidence < CASCADE_MIN_CONFIDENCE:
+        return False
+    return all(abs(score - b) > CASCADE_BORDERLINE_MARGIN for b in CASCADE_READINESS_BOUNDARIES)
 
 
+async def _large_readiness(messages: list) -> dict:
+    content = await chat_completion(
+        model="gpt-4.1",
+        messages=messages,
+        temperature=0.2,
+        route="readiness"
+    )
+    return json.loads(content)
+
+
+async def evaluate_readiness(messages: list) -> dict:
+    """
+    Readiness classification as a cascade: the small model answers first
+    and gpt-4.1 is only called when that answer is low-confidence or
+    borderline. A sample of accepted answers is audited in the background.
+    """
+    if not CASCADE_ENABLED:
+        return await _large_readiness(messages)
+
+    small = None
+    try:
+        content = await chat_completion(
+            model=CASCADE_SMALL_MODEL,
+            messages=messages + [{"role": "system", "content": CASCADE_CONFIDENCE_INSTRUCTION}],
+            temperature=0.2
+        )
+        small = json.loads(content)
+    except Exception:
+        pass
+
+    if small and _is_confident_readiness(small):
+        readiness_cascade.record("decided_by_small_model", saved_large_call=True)
+
+        async def _audit():
+            large = await _large_readiness(messages)
+            return _normalize_status(large) == _normalize_status(small)
+
+        maybe_audit(readiness_cascade, _audit)
+        return small
+
+    large = await _large_readiness(messages)
+    readiness_cascade.record("escalated")
+    if small:
+        readiness_cascade.record_agreement(
+            _normalize_status(small) == _normalize_status(large)
+        )
+    return large
 
 
 def normalize_generated_output(gen_output: dict) -> dict:
@@ -91,67 +191,43 @@ def normalize_generated_output(gen_output: dict) -> dict:
 
 
 
-def run_ai_analysis(context: dict):
+@coalesce("run_ai_analysis")
+async def run_ai_analysis(context: dict):
+    tgci_knowledge = await get_tgci_knowledge()
+
     # ---------- STEP 1: ALWAYS generate organizational profile ----------
-    profile_response = client.chat.completions.create(
+    profile_content = await chat_completion(
         model="gpt-4.1",
         messages=[
-            {
-                "role": "system",
-                "content": f"""
-You are a TGCI-trained grants professional.
-
-Use TGCI knowledge ONLY to structure content,
-never to invent facts.
-
-TGCI KNOWLEDGE:
-{tgci_knowledge}
-"""
-            },
-            {"role": "system", "content": TGCI_ORG_PROFILE_PROMPT},
-            {"role": "user", "content": str(context)}
+            shared_prefix(knowledge_block(tgci_knowledge), PROFILE_ROLE, TGCI_ORG_PROFILE_PROMPT),
+            {"role": "user", "content": pack_context(context, "readiness")}
         ],
-        temperature=0.2
+        temperature=0.2,
+        route="readiness"
     )
 
-    raw_profile = json.loads(profile_response.choices[0].message.content)
+    raw_profile = json.loads(profile_content)
     generated_output = normalize_generated_output(raw_profile)
 
     # ---------- STEP 2: Readiness evaluation ----------
-    readiness_response = client.chat.completions.create(
-        model="gpt-4.1",
-        messages=[
-            {
-                "role": "system",
-                "content": f"""
-You are a TGCI-trained grant readiness evaluator.
-
-Use TGCI knowledge ONLY to judge readiness.
-
-TGCI KNOWLEDGE:
-{tgci_knowledge}
-"""
-            },
-            {"role": "system", "content": TGCI_READINESS_PROMPT},
-            {
-                "role": "user",
-                "content": json.dumps(
-                    {
-                        "organization_profile": generated_output,
-                        "raw_context": context
-                    }
-                )
-            }
-        ],
-        temperature=0.2
-    )
-
-    readiness = json.loads(readiness_response.choices[0].message.content)
+    readiness_messages = [
+        shared_prefix(knowledge_block(tgci_knowledge), READINESS_ROLE, TGCI_READINESS_PROMPT),
+        {
+            "role": "user",
+            "content": pack_context(
+                {
+                    "organization_profile": generated_output,
+                    "raw_context": context
+                },
+                "readiness"
+            )
+        }
+    ]
+
+    readiness = await evaluate_readiness(readiness_messages)
 
     # Normalize status
-    status = readiness["status"].strip().upper()
-    if status not in ["GRANT_READY", "NEEDS_MINOR_IMPROVEMENTS", "NOT_READY"]:
-        status = "NEEDS_MINOR_IMPROVEMENTS"
+    status = _normalize_status(readiness)
 
     return {
         "status": status,
@@ -1,11 +1,12 @@
 import json
-from openai import OpenAI
-from app.config import OPENAI_API_KEY
-from app.data.org_store import get_organization_analysis
+from app.services.llm_client import chat_completion, stream_chat_completion
+from app.utils.json_stream import JSONObjectStreamParser
+from app.services.single_flight import coalesce
+from app.utils.context_packer import pack_context
+from app.utils.prompt_prefix import shared_prefix
+from app.data.org_store import get_organization_analysis, InvalidSessionError
 from app.data.grant_store import get_grant_analysis
 
-client = OpenAI(api_key=OPENAI_API_KEY)
-
 
 TGCI_LOI_PROMPT = """
 You are a TGCI-trained grants professional.
@@ -59,15 +60,10 @@ def normalize_loi_output(raw_output: dict, session_id: str):
     }
 
 
-def generate_loi(session_id: str):
+def _load_loi_messages(session_id: str) -> list:
     org_data = get_organization_analysis(session_id)
     if not org_data:
-        raise ValueError("Invalid session_id")
-
-    # Convert datetime to ISO string
-    org_data_serializable = org_data.copy()
-    if "created_at" in org_data_serializable:
-        org_data_serializable["created_at"] = org_data_serializable["created_at"].isoformat()
+        raise InvalidSessionError("Invalid session_id")
 
     analysis = org_data.get("analysis", {})
 
@@ -76,16 +72,46 @@ def generate_loi(session_id: str):
         "grant": analysis.get("grant", {}),
         "task": "Generate LOI following TGCI standards"
     }
-    
-    response = client.chat.completions.create(
+
+    return [
+        shared_prefix(TGCI_LOI_PROMPT),
+        {"role": "user", "content": pack_context(context, "loi")}
+    ]
+
+
+@coalesce("generate_loi")
+async def generate_loi(session_id: str):
+    content = await chat_completion(
         model="gpt-4.1",
-        messages=[
-            {"role": "system", "content": TGCI_LOI_PROMPT},
-            {"role": "user", "content": json.dumps(context, default=str)}
-        ],
+        messages=_load_loi_messages(session_id),
         temperature=0.2
     )
 
-    raw_loi = json.loads(response.choices[0].message.content)
+    raw_loi = json.loads(content)
     return normalize_loi_output(raw_loi, session_id)
 
+
+def stream_loi(session_id: str):
+    """
+    Stream the LOI as ("section", {...}) events, one per field as soon as
+    it is complete, followed by a ("done", <full LOIResponse>) event.
+    The session is loaded before the stream is returned, so an invalid
+    session raises here instead of inside the response.
+    """
+    return _stream_loi(_load_loi_messages(session_id), session_id)
+
+
+async def _stream_loi(messages: list, session_id: str):
+    parser = JSONObjectStreamParser()
+    raw_loi = {}
+
+    async for delta in stream_chat_completion(
+        model="gpt-4.1",
+        messages=messages,
+        temperature=0.2
+    ):
+        for key, value in parser.feed(delta):
+            raw_loi[key] = value
+            yield "section", {"section": key, "content": value}
+
+    yield "done", normalize_loi_output(raw_loi, session_id)
@@ -1,12 +1,19 @@
 
+import asyncio
 import json
-from openai import OpenAI
-from app.config import OPENAI_API_KEY
-from app.data.org_store import get_organization_analysis
+from app.config import (
+    PROPOSAL_GENERATION_MODE,
+    PROPOSAL_SECTION_CONCURRENCY,
+    PROPOSAL_CONSISTENCY_PASS
+)
+from app.services.llm_client import chat_completion, stream_chat_completion
+from app.utils.json_stream import JSONObjectStreamParser
+from app.services.single_flight import coalesce
+from app.utils.context_packer import pack_context
+from app.utils.prompt_prefix import shared_prefix
+from app.data.org_store import get_organization_analysis, InvalidSessionError
 from app.data.grant_store import get_grant_analysis
 
-client = OpenAI(api_key=OPENAI_API_KEY)
-
 TGCI_PROPOSAL_PROMPT = """
 You are a TGCI-trained grants professional.
 
@@ -76,19 +83,66 @@ OUTPUT FORMAT (JSON ONLY):
 }
 """
 
-def normalize_proposal_output(raw_output: dict, session_id: str):
-    budget = raw_output.get("budget_summary", {})
+# Section key -> what that section must cover (used in "sections" mode)
+PROPOSAL_SECTIONS = {
+    "executive_summary": "Executive Summary: a concise overview of the organization, the need, the proposed program and the request.",
+    "organization_background": "Introduction to the Organization: mission, history, programs and credibility.",
+    "problem_statement": "Statement of Need / Problem: the problem the program addresses and for whom.",
+    "program_description": "Program Description (Methods & Activities): what will be done, by whom and how.",
+    "goals_and_objectives": "Goals and Objectives: the intended results of the program.",
+    "evaluation_plan": "Evaluation Plan: how progress and results will be measured.",
+    "organizational_capacity": "Organizational Capacity: why the organization can deliver the program.",
+    "sustainability_plan": "Sustainability Plan: how the work continues after the grant period.",
+    "budget_summary": "Budget Summary: follow the BUDGET HANDLING RULES; the value is an object with line_items and total_estimated_budget.",
+    "conclusion": "Conclusion: a short closing that restates the case for funding.",
+}
+
+TGCI_PROPOSAL_SECTION_PROMPT = """
+Write ONLY the following section of the proposal:
+{instruction}
+
+Return JSON ONLY with exactly one key:
+{{"{key}": ...}}
+"""
+
+TGCI_PROPOSAL_CONSISTENCY_PROMPT = """
+The draft proposal below was written section by section.
+Edit it into one consistent document:
+- Align terminology, names, numbers and goals across sections
+- Remove contradictions and unnecessary repetition
+- Do NOT add new facts, programs, metrics or amounts
+
+Return JSON ONLY with the same keys as the draft.
+"""
+
+
+# Model output key -> ProposalResponse field, where they differ
+PROPOSAL_FIELD_NAMES = {
+    "organization_background": "introduction_to_organization",
+    "program_description": "methods_and_activities",
+}
+
+
+def normalize_budget_summary(budget) -> dict:
+    if not isinstance(budget, dict):
+        budget = {}
 
     # Normalize line items
     normalized_line_items = []
-    if isinstance(budget, dict):
-        for item in budget.get("line_items", []):
-            normalized_line_items.append({
-                "category": item.get("category", ""),
-                "description": item.get("description", ""),
-                "estimated_cost": item.get("estimated_cost", "")
-            })
+    for item in budget.get("line_items", []):
+        normalized_line_items.append({
+            "category": item.get("category", ""),
+            "description": item.get("description", ""),
+            "estimated_cost": item.get("estimated_cost", "")
+        })
+
+    return {
+        "line_items": normalized_line_items,
+        "total_estimated_budget": budget.get("total_estimated_budget", "")
+    }
+
 
+def normalize_proposal_output(raw_output: dict, session_id: str):
     return {
         "executive_summary": raw_output.get("executive_summary", ""),
         "introduction_to_organization": raw_output.get("organization_background", ""),
@@ -96,48 +150,142 @@ def normalize_proposal_output(raw_output: dict, session_id: str):
         "goals_and_objectives": raw_output.get("goals_and_objectives", ""),
         "methods_and_activities": raw_output.get("program_description", ""),
         "evaluation_plan": raw_output.get("evaluation_plan", ""),
+        "organizational_capacity": raw_output.get("organizational_capacity", ""),
         "sustainability_plan": raw_output.get("sustainability_plan", ""),
-        "budget_summary": {
-            "line_items": normalized_line_items,
-            "total_estimated_budget": budget.get("total_estimated_budget", "")
-        },
+        "budget_summary": normalize_budget_summary(raw_output.get("budget_summary", {})),
         "conclusion": raw_output.get("conclusion", ""),
         "session_id": session_id
     }
 
 
+def _proposal_messages(packed_context: str) -> list:
+    # Shared by every call of a request so the prompt prefix is identical
+    return [
+        shared_prefix(TGCI_PROPOSAL_PROMPT),
+        {"role": "user", "content": packed_context}
+    ]
+
+
+async def _generate_single(packed_context: str) -> dict:
+    content = await chat_completion(
+        model="gpt-4.1",
+        messages=_proposal_messages(packed_context),
+        temperature=0.2
+    )
+    return json.loads(content)
+
+
+async def _generate_section(packed_context: str, key: str, semaphore: asyncio.Semaphore):
+    async with semaphore:
+        content = await chat_completion(
+            model="gpt-4.1",
+            messages=_proposal_messages(packed_context) + [
+                {
+                    "role": "user",
+                    "content": TGCI_PROPOSAL_SECTION_PROMPT.format(
+                        key=key,
+                        instruction=PROPOSAL_SECTIONS[key]
+                    )
+                }
+            ],
+            temperature=0.2
+        )
+
+    section = json.loads(content)
+    return section.get(key, section) if isinstance(section, dict) else section
+
+
+async def _generate_by_sections(packed_context: str, consistency_pass: bool) -> dict:
+    semaphore = asyncio.Semaphore(PROPOSAL_SECTION_CONCURRENCY)
+    keys = list(PROPOSAL_SECTIONS)
+
+    sections = await asyncio.gather(
+        *(_generate_section(packed_context, key, semaphore) for key in keys)
+    )
+    draft = dict(zip(keys, sections))
+
+    if not consistency_pass:
+        return draft
 
+    content = await chat_completion(
+        model="gpt-4.1",
+        messages=_proposal_messages(packed_context) + [
+            {"role": "user", "content": TGCI_PROPOSAL_CONSISTENCY_PROMPT},
+            {"role": "user", "content": json.dumps(draft, ensure_ascii=False)}
+        ],
+        temperature=0.2
+    )
+    revised = json.loads(content)
 
+    # Keep the draft for any section the revision dropped
+    return {key: revised.get(key) or draft[key] for key in keys}
 
 
-def generate_proposal(session_id: str):
+def _load_proposal_context(session_id: str) -> dict:
     org_data = get_organization_analysis(session_id)
     if not org_data:
-        raise ValueError("Invalid session_id")
-
-     # Convert datetime to ISO string
-    org_data_serializable = org_data.copy()
-    if "created_at" in org_data_serializable:
-        org_data_serializable["created_at"] = org_data_serializable["created_at"].isoformat()
+        raise InvalidSessionError("Invalid session_id")
 
     analysis = org_data.get("analysis", {})
 
-    context = {
+    return {
         "organization": analysis.get("organization", {}),
         "grant": analysis.get("grant", {}),
         "task": "Generate Proposal following TGCI standards"
     }
 
-    response = client.chat.completions.create(
+
+@coalesce("generate_proposal")
+async def generate_proposal(session_id: str, mode: str = None, consistency_pass: bool = None):
+    """
+    Generate a TGCI proposal for a combined org + grant session.
+
+    mode "single" asks for the whole proposal in one call; "sections"
+    writes each section as a concurrent call sharing the same context
+    prefix, optionally followed by a consistency pass.
+    """
+    mode = mode or PROPOSAL_GENERATION_MODE
+    if mode not in ("single", "sections"):
+        raise ValueError(f"Invalid proposal mode: {mode}")
+    if consistency_pass is None:
+        consistency_pass = PROPOSAL_CONSISTENCY_PASS
+
+    # Packed once: every call of the request sends the same context
+    packed_context = pack_context(_load_proposal_context(session_id), "proposal")
+
+    if mode == "sections":
+        proposal = await _generate_by_sections(packed_context, consistency_pass)
+    else:
+        proposal = await _generate_single(packed_context)
+
+    return normalize_proposal_output(proposal, session_id)
+
+
+def stream_proposal(session_id: str):
+    """
+    Stream a single-call proposal as ("section", {...}) events, one per
+    section as soon as the model has finished writing it, followed by a
+    ("done", <full ProposalResponse>) event. The session is loaded before
+    the stream is returned, so an invalid session raises here instead of
+    inside the response.
+    """
+    return _stream_proposal(pack_context(_load_proposal_context(session_id), "proposal"), session_id)
+
+
+async def _stream_proposal(packed_context: str, session_id: str):
+    parser = JSONObjectStreamParser()
+    proposal = {}
+
+    async for delta in stream_chat_completion(
         model="gpt-4.1",
-        messages=[
-            {"role": "system", "content": TGCI_PROPOSAL_PROMPT},
-            {"role": "user", "content": json.dumps(context, default=str)}
-        ],
+        messages=_proposal_messages(packed_context),
         temperature=0.2
-    ) 
+    ):
+        for key, value in parser.feed(delta):
+            proposal[key] = value
+            if key == "budget_summary":
+                value = normalize_budget_summary(value)
+            field = PROPOSAL_FIELD_NAMES.get(key, key)
+            yield "section", {"section": field, "content": value}
 
-    proposal = json.loads(response.choices[0].message.content)
-    
- 
-    return normalize_proposal_output(proposal, session_id)
+    yield "done", normalize_proposal_output(proposal, session_id)
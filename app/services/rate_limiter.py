@@ -0,0 +1,185 @@
+# app/services/rate_limiter.py
+import asyncio
+import time
+from app.config import (
+    LLM_RATE_LIMITS,
+    LLM_DEFAULT_RATE_LIMIT,
+    LLM_MAX_CONCURRENCY,
+    LLM_ADAPTIVE_MIN_CONCURRENCY,
+    LLM_ADAPTIVE_INITIAL_CONCURRENCY,
+    LLM_LATENCY_TARGET_SECONDS,
+    WEB_CONCURRENCY
+)
+
+
+class TokenBucket:
+    """
+    Continuous-refill bucket holding up to one minute of budget.
+    The level may go negative when actual usage exceeds the estimate;
+    later callers then wait for the debt to be repaid.
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.level = per_minute
+        self._rate = per_minute / 60.0
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self._rate)
+        self._updated = now
+
+    async def acquire(self, amount: float) -> float:
+        """Wait until amount is available, take it, and return the seconds waited."""
+        amount = min(amount, self.capacity)   # oversized requests wait for a full bucket
+        waited = 0.0
+        while True:
+            self._refill()
+            if self.level >= amount:
+                self.level -= amount
+                return waited
+            delay = (amount - self.level) / self._rate
+            await asyncio.sleep(delay)
+            waited += delay
+
+    def adjust(self, amount: float):
+        """Debit (positive) or refund (negative) after the real cost is known."""
+        self._refill()
+        self.level = min(self.capacity, self.level - amount)
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD concurrency limit: +1 after a full window of healthy calls,
+    halved on 429, reduced by 10% when a call exceeds the latency target.
+    At most one decrease per window: calls started before the last
+    decrease already ran under the old limit, so their 429s and slow
+    responses do not cut it again.
+    """
+
+    def __init__(self, initial: int, minimum: int, maximum: int, latency_target: float):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latency_target = latency_target
+        self.in_flight = 0
+        self._decreased_at = float("-inf")
+        self._condition = asyncio.Condition()
+
+    async def acquire(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    async def release(self, latency: float, throttled: bool, started: float = None):
+        async with self._condition:
+            self.in_flight -= 1
+            if throttled or latency > self.latency_target:
+                if started is None or started >= self._decreased_at:
+                    self.limit = max(self.minimum, self.limit * (0.5 if throttled else 0.9))
+                    self._decreased_at = time.monotonic()
+            else:
+                self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            self._condition.notify_all()
+
+
+class _Slot:
+    """One admitted request; reports throttling and real token usage back to its limiter."""
+
+    def __init__(self, limiter, estimated_tokens: int):
+        self.limiter = limiter
+        self.estimated_tokens = estimated_tokens
+        self.is_throttled = False
+        self._started = None
+
+    def throttled(self):
+        self.is_throttled = True
+        self.limiter.counters["throttled"] += 1
+
+    def record_usage(self, total_tokens: int):
+        if total_tokens is None:
+            return
+        self.limiter.tpm.adjust(total_tokens - self.estimated_tokens)
+        self.limiter.counters["tokens"] += total_tokens
+
+    async def __aenter__(self):
+        limiter = self.limiter
+        await limiter.concurrency.acquire()
+        try:
+            waited = await limiter.rpm.acquire(1)
+            waited += await limiter.tpm.acquire(self.estimated_tokens)
+        except BaseException:
+            await limiter.concurrency.release(0.0, False)
+            raise
+        limiter.counters["requests"] += 1
+        limiter.counters["wait_seconds"] += waited
+        self._started = time.monotonic()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        latency = time.monotonic() - self._started
+        self.limiter.counters["latency_seconds"] += latency
+        await self.limiter.concurrency.release(latency, self.is_throttled, self._started)
+        return False
+
+
+class ModelRateLimiter:
+    """Requests/min, tokens/min and adaptive concurrency for one model."""
+
+    def __init__(self, model: str, rpm: int, tpm: int):
+        self.model = model
+        self.rpm = TokenBucket(rpm)
+        self.tpm = TokenBucket(tpm)
+        self.concurrency = AdaptiveConcurrency(
+            initial=max(LLM_ADAPTIVE_MIN_CONCURRENCY,
+                        min(LLM_ADAPTIVE_INITIAL_CONCURRENCY, LLM_MAX_CONCURRENCY) // WEB_CONCURRENCY),
+            minimum=LLM_ADAPTIVE_MIN_CONCURRENCY,
+            maximum=LLM_MAX_CONCURRENCY,
+            latency_target=LLM_LATENCY_TARGET_SECONDS
+        )
+        self.counters = {
+            "requests": 0,
+            "throttled": 0,
+            "tokens": 0,
+            "wait_seconds": 0.0,
+            "latency_seconds": 0.0
+        }
+
+    def slot(self, estimated_tokens: int) -> _Slot:
+        return _Slot(self, estimated_tokens)
+
+    def stats(self) -> dict:
+        stats = dict(self.counters)
+        stats["concurrency_limit"] = round(self.concurrency.limit, 2)
+        stats["in_flight"] = self.concurrency.in_flight
+        stats["rpm_available"] = round(self.rpm.level, 2)
+        stats["tpm_available"] = round(self.tpm.level, 2)
+        requests = stats["requests"] or 1
+        stats["avg_wait_seconds"] = round(stats["wait_seconds"] / requests, 4)
+        stats["avg_latency_seconds"] = round(stats["latency_seconds"] / requests, 4)
+        return stats
+
+
+_limiters = {}
+
+
+def get_rate_limiter(model: str) -> ModelRateLimiter:
+    """
+    The limiter for model in this worker. LLM_RATE_LIMITS are account-wide,
+    and each of the WEB_CONCURRENCY workers limits itself to an equal share.
+    """
+    limiter = _limiters.get(model)
+    if limiter is None:
+        limits = LLM_RATE_LIMITS.get(model, LLM_DEFAULT_RATE_LIMIT)
+        limiter = ModelRateLimiter(
+            model,
+            rpm=limits["rpm"] / WEB_CONCURRENCY,
+            tpm=limits["tpm"] / WEB_CONCURRENCY
+        )
+        _limiters[model] = limiter
+    return limiter
+
+
+def rate_limiter_stats() -> dict:
+    return {model: limiter.stats() for model, limiter in _limiters.items()}
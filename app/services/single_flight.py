@@ -0,0 +1,126 @@
+# app/services/single_flight.py
+import asyncio
+import copy
+import functools
+import hashlib
+import json
+from app.config import IDEMPOTENCY_TTL_SECONDS
+from app.data.session_store import create_session_store
+
+# key -> task of the in-flight call
+_in_flight = {}
+_counters = {"executed": 0, "coalesced": 0, "idempotent_replays": 0}
+
+# Completed results for client-supplied Idempotency-Key headers
+IDEMPOTENCY_STORE = create_session_store("idempotency", ttl_seconds=IDEMPOTENCY_TTL_SECONDS)
+
+
+class IdempotencyKeyConflictError(ValueError):
+    pass
+
+
+def _canonical(value):
+    if isinstance(value, bytes):
+        return "sha256:" + hashlib.sha256(value).hexdigest()
+    if hasattr(value, "dict"):
+        return value.dict()
+    return str(value)
+
+
+def flight_key(operation: str, *args, **kwargs) -> str:
+    """Stable hash of an operation and its inputs."""
+    canonical = json.dumps(
+        [operation, args, kwargs],
+        sort_keys=True,
+        ensure_ascii=False,
+        default=_canonical
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+async def single_flight(key: str, fn):
+    """
+    Run fn() once per key: concurrent callers with the same key await the
+    first caller's task instead of starting their own. Every caller gets
+    its own copy of the result, so callers may mutate it freely.
+    """
+    task = _in_flight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(fn())
+        _in_flight[key] = task
+        task.add_done_callback(lambda t: _in_flight.pop(key, None) if _in_flight.get(key) is t else None)
+        _counters["executed"] += 1
+    else:
+        _counters["coalesced"] += 1
+
+    # shield: one caller disconnecting must not cancel the shared work
+    result = await asyncio.shield(task)
+    return copy.deepcopy(result)
+
+
+def coalesce(operation: str):
+    """
+    Decorator: deduplicate concurrent calls of an async service function
+    that have the same arguments.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            key = flight_key(operation, *args, **kwargs)
+            return await single_flight(key, lambda: fn(*args, **kwargs))
+        return wrapper
+    return decorator
+
+
+async def run_idempotent(operation: str, idempotency_key: str, inputs: dict, fn):
+    """
+    Honour an Idempotency-Key: the first completed result for
+    (operation, key) is stored and returned to every retry. Reusing a key
+    with different inputs raises IdempotencyKeyConflictError before any
+    work runs, even while the first request is still in flight.
+    """
+    if not idempotency_key:
+        return await fn()
+
+    store_key = f"{operation}:{idempotency_key}"
+    fingerprint = flight_key(operation, **inputs)
+
+    stored = IDEMPOTENCY_STORE.get(store_key)
+    if stored is None:
+        # Claim the key for these inputs (atomically, across workers)
+        stored = IDEMPOTENCY_STORE.update(
+            store_key,
+            lambda current: current or {"fingerprint": fingerprint, "pending": True}
+        )
+
+    if stored["fingerprint"] != fingerprint:
+        raise IdempotencyKeyConflictError(
+            "Idempotency-Key was already used with different request parameters"
+        )
+
+    if not stored.get("pending"):
+        _counters["idempotent_replays"] += 1
+        return copy.deepcopy(stored["result"])
+
+    try:
+        # In-flight retries with the same key share one execution
+        result = await single_flight("idempotency:" + store_key + ":" + fingerprint, fn)
+    except BaseException:
+        # Release the claim so that a retry can run the work again
+        current = IDEMPOTENCY_STORE.get(store_key)
+        if current and current.get("pending"):
+            IDEMPOTENCY_STORE.delete(store_key)
+        raise
+
+    stored = IDEMPOTENCY_STORE.update(
+        store_key,
+        lambda current: current if current and not current.get("pending")
+        else {"fingerprint": fingerprint, "result": result}
+    )
+    return copy.deepcopy(stored["result"])
+
+
+def single_flight_stats() -> dict:
+    stats = dict(_counters)
+    stats["in_flight"] = len(_in_flight)
+    return stats
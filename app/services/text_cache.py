@@ -0,0 +1,110 @@
+# app/services/text_cache.py
+import json
+import os
+import sqlite3
+import threading
+import time
+from app.config import DOC_TEXT_CACHE_MAX_BYTES, DOC_TEXT_CACHE_DB_PATH
+
+
+class DocumentTextCache:
+    """
+    Normalized text of documents, keyed by the SHA-256 of their bytes.
+
+    Content-addressed entries never go stale, so there is no TTL: the
+    SQLite file is only bounded by total size, least recently used first.
+    Each entry keeps the character offset at which every page starts.
+    """
+
+    def __init__(self, db_path: str, max_bytes: int):
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        self._conn = None
+        self._conn_pid = None
+        self._counters = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+    def _connect(self):
+        # The SQLite file is shared by all workers; each process opens its own connection
+        if self._conn is None or self._conn_pid != os.getpid():
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS document_text (
+                    key TEXT PRIMARY KEY,
+                    text TEXT NOT NULL,
+                    page_offsets TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    last_access REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_document_text_access ON document_text(last_access)")
+            self._conn = conn
+            self._conn_pid = os.getpid()
+        return self._conn
+
+    def get(self, key: str):
+        """{"text", "page_offsets"} for key, or None."""
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT text, page_offsets FROM document_text WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self._counters["misses"] += 1
+                return None
+
+            with conn:
+                conn.execute("UPDATE document_text SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._counters["hits"] += 1
+            return {"text": row[0], "page_offsets": json.loads(row[1])}
+
+    def set(self, key: str, text: str, page_offsets: list):
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO document_text (key, text, page_offsets, size, last_access) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, text, json.dumps(page_offsets), len(text.encode("utf-8")), time.time())
+                )
+            self._counters["writes"] += 1
+            self._evict(conn)
+
+    def _evict(self, conn):
+        with conn:
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM document_text").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+
+            for key, size in conn.execute(
+                "SELECT key, size FROM document_text ORDER BY last_access ASC"
+            ).fetchall():
+                if total <= self.max_bytes:
+                    break
+                conn.execute("DELETE FROM document_text WHERE key = ?", (key,))
+                total -= size
+                self._counters["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute("DELETE FROM document_text")
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._counters)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        return stats
+
+
+document_text_cache = DocumentTextCache(
+    db_path=DOC_TEXT_CACHE_DB_PATH,
+    max_bytes=DOC_TEXT_CACHE_MAX_BYTES
+)
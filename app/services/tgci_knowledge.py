@@ -1,9 +1,45 @@
-from langchain_community.vectorstores import FAISS
-from langchain_openai import OpenAIEmbeddings
+import asyncio
+import hashlib
+import json
+import os
+from datetime import datetime
 from pathlib import Path
-from app.config import VECTOR_DB_PATH, EMBEDDING_MODEL, OPENAI_API_KEY
+from app.config import (
+    VECTOR_DB_PATH,
+    EMBEDDING_MODEL,
+    OPENAI_API_KEY,
+    TGCI_KNOWLEDGE_BUNDLE_PATH
+)
+
+# Bump when the bundle layout changes (query edits are caught by tgci_queries_hash)
+TGCI_KNOWLEDGE_BUNDLE_VERSION = 1
+
+# Fixed retrieval queries. Their results are precompiled into the bundle at ingest time.
+TGCI_KNOWLEDGE_QUERIES = {
+    "core": {
+        "query": (
+            "TGCI grantsmanship principles, proposal readiness, "
+            "organizational maturity, evaluation standards, "
+            "grant opportunity structure, RFP components, "
+            "alignment assessment, common pitfalls"
+        ),
+        "k": 8
+    }
+}
+
+
+def tgci_queries_hash() -> str:
+    """Hash of every canned query's text and k, stored in the bundle."""
+    canonical = json.dumps(
+        {name: [spec["query"], spec["k"]] for name, spec in TGCI_KNOWLEDGE_QUERIES.items()},
+        sort_keys=True
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
 
 _tgci_store = None
+_tgci_knowledge = None
+_warmup_task = None
 
 
 def _load_store():
@@ -12,6 +48,10 @@ def _load_store():
     if _tgci_store is not None:
         return _tgci_store
 
+    # Imported here so that importing the app does not pay for LangChain/FAISS
+    from langchain_community.vectorstores import FAISS
+    from langchain_openai import OpenAIEmbeddings
+
     embeddings = OpenAIEmbeddings(
         model=EMBEDDING_MODEL,
         api_key=OPENAI_API_KEY
@@ -33,21 +73,121 @@ def _load_store():
     return _tgci_store
 
 
-def load_tgci_knowledge() -> str:
+def build_tgci_knowledge_bundle(store) -> dict:
+    """
+    Run every canned query against the FAISS store and
+    package the passages with index metadata.
+    """
+    queries = {}
+    for name, spec in TGCI_KNOWLEDGE_QUERIES.items():
+        docs = store.similarity_search(query=spec["query"], k=spec["k"])
+        queries[name] = {
+            "query": spec["query"],
+            "k": spec["k"],
+            "passages": [
+                {"content": doc.page_content, "metadata": doc.metadata}
+                for doc in docs
+            ]
+        }
+
+    return {
+        "version": TGCI_KNOWLEDGE_BUNDLE_VERSION,
+        "queries_hash": tgci_queries_hash(),
+        "created_at": datetime.utcnow().isoformat(),
+        "index": {
+            "path": VECTOR_DB_PATH,
+            "embedding_model": EMBEDDING_MODEL,
+            "dimension": store.index.d,
+            "total_vectors": store.index.ntotal
+        },
+        "queries": queries
+    }
+
+
+def load_tgci_knowledge_bundle(path: str = TGCI_KNOWLEDGE_BUNDLE_PATH):
+    """
+    Read the precompiled bundle. Returns None if it is missing or stale.
+    """
+    if not os.path.exists(path):
+        return None
+
+    with open(path, "r", encoding="utf-8") as f:
+        bundle = json.load(f)
+
+    if bundle.get("version") != TGCI_KNOWLEDGE_BUNDLE_VERSION:
+        return None
+    if bundle.get("index", {}).get("embedding_model") != EMBEDDING_MODEL:
+        return None
+    # An edited query text or k makes the precompiled passages stale
+    if bundle.get("queries_hash") != tgci_queries_hash():
+        return None
+
+    return bundle
+
+
+def load_tgci_knowledge(query_name: str = "core") -> str:
     """
     Load TGCI conceptual knowledge (NOT for citation).
     Used only to ground evaluation logic, patterns, and style.
+
+    Reads the precompiled bundle written by app/rag/ingest.py and only
+    falls back to a live FAISS search when the bundle is missing or stale.
     """
+    bundle = load_tgci_knowledge_bundle()
+    if bundle is not None:
+        passages = bundle["queries"][query_name]["passages"]
+        return "\n\n".join(p["content"] for p in passages)
+
+    spec = TGCI_KNOWLEDGE_QUERIES[query_name]
     store = _load_store()
 
-    docs = store.similarity_search(
-        query=(
-            "TGCI grantsmanship principles, proposal readiness, "
-            "organizational maturity, evaluation standards, "
-            "grant opportunity structure, RFP components, "
-            "alignment assessment, common pitfalls"
-        ),
-        k=8
-    )
+    docs = store.similarity_search(query=spec["query"], k=spec["k"])
 
     return "\n\n".join(doc.page_content for doc in docs)
+
+
+async def _warm_up() -> str:
+    global _tgci_knowledge
+    _tgci_knowledge = await asyncio.to_thread(load_tgci_knowledge)
+    return _tgci_knowledge
+
+
+def start_tgci_warmup():
+    """
+    Start loading TGCI knowledge in the background (idempotent).
+    A failed warm-up is retried on the next call.
+    """
+    global _warmup_task
+
+    if _warmup_task is None or (
+        _warmup_task.done() and (_warmup_task.cancelled() or _warmup_task.exception())
+    ):
+        _warmup_task = asyncio.create_task(_warm_up())
+
+    return _warmup_task
+
+
+async def get_tgci_knowledge() -> str:
+    """
+    Return TGCI knowledge, waiting for the warm-up if it is still running.
+    """
+    if _tgci_knowledge is not None:
+        return _tgci_knowledge
+
+    # shield: a cancelled request must not cancel the shared warm-up
+    return await asyncio.shield(start_tgci_warmup())
+
+
+def tgci_knowledge_status() -> dict:
+    """
+    Readiness of the TGCI knowledge: not_started | loading | ready | failed.
+    """
+    if _tgci_knowledge is not None:
+        return {"status": "ready"}
+    if _warmup_task is None:
+        return {"status": "not_started"}
+    if not _warmup_task.done():
+        return {"status": "loading"}
+    if _warmup_task.cancelled():
+        return {"status": "failed", "error": "warm-up cancelled"}
+    return {"status": "failed", "error": repr(_warmup_task.exception())}
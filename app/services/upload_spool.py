@@ -0,0 +1,146 @@
+# app/services/upload_spool.py
+import asyncio
+import hashlib
+import os
+import time
+import uuid
+from contextlib import suppress
+from starlette.responses import JSONResponse
+from app.config import (
+    UPLOAD_MAX_BYTES,
+    UPLOAD_SPOOL_DIR,
+    UPLOAD_SPOOL_TTL_SECONDS,
+    UPLOAD_SPOOL_PURGE_INTERVAL_SECONDS
+)
+
+CHUNK_BYTES = 1024 * 1024
+# Form fields and part headers sent along with the file
+MULTIPART_OVERHEAD_BYTES = 1024 * 1024
+
+_last_purge = 0.0
+
+
+class UploadTooLargeError(ValueError):
+    pass
+
+
+def _purge_expired(now: float):
+    # Spooled files outlive the request (background jobs read them later)
+    try:
+        names = os.listdir(UPLOAD_SPOOL_DIR)
+    except FileNotFoundError:
+        return
+    for name in names:
+        path = os.path.join(UPLOAD_SPOOL_DIR, name)
+        try:
+            if now - os.path.getmtime(path) > UPLOAD_SPOOL_TTL_SECONDS:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+def _maybe_purge():
+    # Listing the spool directory is not free: at most once per interval
+    global _last_purge
+    now = time.time()
+    if now - _last_purge >= UPLOAD_SPOOL_PURGE_INTERVAL_SECONDS:
+        _last_purge = now
+        _purge_expired(now)
+
+
+def _finish(tmp_path: str, digest: str) -> str:
+    path = os.path.join(UPLOAD_SPOOL_DIR, digest)
+    try:
+        os.utime(path)   # same content already spooled: keep it alive
+    except FileNotFoundError:
+        # New content, or another worker just purged the old copy
+        os.replace(tmp_path, path)
+    else:
+        with suppress(FileNotFoundError):
+            os.remove(tmp_path)
+    _maybe_purge()
+    return path
+
+
+async def spool_upload(upload, max_bytes: int = UPLOAD_MAX_BYTES) -> dict:
+    """
+    Stream an UploadFile to the spool directory in chunks, hashing as it
+    goes. Files are named by SHA-256, so identical uploads share one file.
+    Returns {"path", "size", "sha256"}; raises UploadTooLargeError past
+    max_bytes without reading the rest.
+    """
+    os.makedirs(UPLOAD_SPOOL_DIR, exist_ok=True)
+    tmp_path = os.path.join(UPLOAD_SPOOL_DIR, f".{uuid.uuid4().hex}.part")
+    sha256 = hashlib.sha256()
+    size = 0
+
+    try:
+        with open(tmp_path, "wb") as out:
+            while True:
+                chunk = await upload.read(CHUNK_BYTES)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLargeError(f"Upload is larger than {max_bytes} bytes")
+                sha256.update(chunk)
+                await asyncio.to_thread(out.write, chunk)
+    except BaseException:
+        with suppress(FileNotFoundError):
+            os.remove(tmp_path)
+        raise
+
+    digest = sha256.hexdigest()
+    path = await asyncio.to_thread(_finish, tmp_path, digest)
+    return {"path": path, "size": size, "sha256": digest}
+
+
+def spool_bytes(content: bytes) -> dict:
+    """Spool an in-memory document (e.g. a downloaded RFP) like an upload."""
+    os.makedirs(UPLOAD_SPOOL_DIR, exist_ok=True)
+    digest = hashlib.sha256(content).hexdigest()
+    tmp_path = os.path.join(UPLOAD_SPOOL_DIR, f".{uuid.uuid4().hex}.part")
+    with open(tmp_path, "wb") as out:
+        out.write(content)
+    return {"path": _finish(tmp_path, digest), "size": len(content), "sha256": digest}
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Reject oversized multipart bodies before they are parsed.
+
+    Starlette writes every uploaded part to a temporary file before the
+    endpoint (and spool_upload's check) runs. A Content-Length over the
+    limit gets a 413 straight away. A body without one (chunked) is
+    counted as it arrives and stopped with UploadTooLargeError.
+    """
+
+    def __init__(self, app, max_bytes: int = UPLOAD_MAX_BYTES + MULTIPART_OVERHEAD_BYTES):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        headers = dict(scope["headers"])
+        if not headers.get(b"content-type", b"").startswith(b"multipart/"):
+            return await self.app(scope, receive, send)
+
+        detail = f"Upload is larger than {UPLOAD_MAX_BYTES} bytes"
+        length = headers.get(b"content-length", b"")
+        if length.isdigit() and int(length) > self.max_bytes:
+            response = JSONResponse(status_code=413, content={"detail": detail})
+            return await response(scope, receive, send)
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    raise UploadTooLargeError(detail)
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -0,0 +1,234 @@
+# app/services/website_crawler.py
+import asyncio
+import hashlib
+import heapq
+import json
+import time
+from urllib.parse import urljoin, urlsplit, urlunsplit, parse_qsl, urlencode
+from urllib.robotparser import RobotFileParser
+from app.config import (
+    HTTP_USER_AGENT,
+    CRAWL_MAX_PAGES,
+    CRAWL_MAX_DEPTH,
+    CRAWL_TIME_BUDGET_SECONDS,
+    CRAWL_MAX_BYTES,
+    CRAWL_MAX_PAGE_BYTES,
+    CRAWL_CONCURRENCY,
+    CRAWL_HOST_DELAY_SECONDS
+)
+from app.services.http_fetch import FetchError, HTML_TYPES
+from app.services.http_cache import fetch_text
+from app.utils.html_extract import extract_html, resolve_backend as resolve_html_backend
+
+# Pages that usually describe an organization, by words in the link path or text
+PRIORITY_KEYWORDS = {
+    "about": 3, "mission": 3, "programs": 3, "program": 3, "impact": 3,
+    "annual-report": 3, "annual report": 3, "what-we-do": 3, "what we do": 3,
+    "our-work": 2, "our work": 2, "history": 2, "services": 2, "projects": 2,
+    "who-we-are": 2, "who we are": 2, "results": 2, "outcomes": 2,
+    "team": 1, "board": 1, "leadership": 1, "partners": 1, "reports": 1,
+}
+
+# Links that never lead to organization content
+SKIP_PATH_WORDS = ("login", "signin", "cart", "checkout", "donate", "privacy", "terms", "cookie", "wp-admin")
+SKIP_EXTENSIONS = (
+    ".pdf", ".doc", ".docx", ".xls", ".xlsx", ".ppt", ".pptx", ".zip",
+    ".jpg", ".jpeg", ".png", ".gif", ".svg", ".webp", ".mp3", ".mp4", ".css", ".js", ".xml", ".ics"
+)
+TRACKING_PARAMS = ("utm_", "fbclid", "gclid", "mc_cid", "mc_eid")
+
+MAX_ROBOTS_DELAY_SECONDS = 5.0
+
+
+def normalize_url(url: str, base: str = None):
+    """
+    Canonical form used to dedupe pages: absolute, http(s) only, lowercase
+    host, no default port, fragment or tracking parameters, and no trailing
+    slash except on the root. Returns None for URLs that are not crawlable.
+    """
+    if base:
+        url = urljoin(base, url)
+    parts = urlsplit(url.strip())
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        return None
+
+    host = parts.hostname.lower()
+    if parts.port and parts.port != {"http": 80, "https": 443}[parts.scheme]:
+        host = f"{host}:{parts.port}"
+
+    path = parts.path or "/"
+    if path != "/" and path.endswith("/"):
+        path = path.rstrip("/")
+
+    query = urlencode(sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith(TRACKING_PARAMS)
+    ))
+    return urlunsplit((parts.scheme, host, path, query, ""))
+
+
+def _site(url: str) -> str:
+    host = urlsplit(url).netloc.lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def link_score(url: str, anchor_text: str) -> int:
+    haystack = f"{urlsplit(url).path.lower()} {anchor_text.lower()}"
+    return sum(weight for word, weight in PRIORITY_KEYWORDS.items() if word in haystack)
+
+
+class _Crawl:
+    def __init__(self, start_url: str):
+        self.start_url = start_url
+        self.site = _site(start_url)
+        self.deadline = time.monotonic() + CRAWL_TIME_BUDGET_SECONDS
+        self.frontier = []          # heap of (-score, depth, seq, url)
+        self.seen_urls = {start_url}
+        self.seen_hashes = set()
+        self.pages = []
+        self.bytes_used = 0
+        self.in_flight = 0
+        self.seq = 0
+        self.robots = None
+        self.delay = CRAWL_HOST_DELAY_SECONDS
+        self.next_request_at = 0.0
+        self.politeness = asyncio.Lock()
+        self.wakeup = asyncio.Event()
+
+    def push(self, url: str, score: int, depth: int):
+        self.seq += 1
+        heapq.heappush(self.frontier, (-score, depth, self.seq, url))
+        self.wakeup.set()
+
+    def done(self) -> bool:
+        return (
+            len(self.pages) >= CRAWL_MAX_PAGES
+            or self.bytes_used >= CRAWL_MAX_BYTES
+            or time.monotonic() >= self.deadline
+        )
+
+    async def load_robots(self):
+        root = urlunsplit(urlsplit(self.start_url)[:2] + ("/robots.txt", "", ""))
+
+        async def _extract(resp):
+            return resp.text
+
+        try:
+            text = await fetch_text(root, "robots", _extract, allowed_types=("text/plain",), max_bytes=512 * 1024)
+        except FetchError:
+            return  # no robots.txt: everything allowed
+
+        robots = RobotFileParser()
+        robots.parse(text.splitlines())
+        self.robots = robots
+        crawl_delay = robots.crawl_delay(HTTP_USER_AGENT)
+        if crawl_delay:
+            self.delay = max(self.delay, min(float(crawl_delay), MAX_ROBOTS_DELAY_SECONDS))
+
+    def allowed(self, url: str) -> bool:
+        return self.robots is None or self.robots.can_fetch(HTTP_USER_AGENT, url)
+
+    async def polite_wait(self):
+        # Space out request starts to the host
+        async with self.politeness:
+            wait = self.next_request_at - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self.next_request_at = time.monotonic() + self.delay
+
+    async def fetch_page(self, url: str):
+        async def _extract(resp):
+            self.bytes_used += len(resp.content)
+            page = await asyncio.to_thread(extract_html, resp.text)
+            page["final_url"] = resp.url   # after redirects
+            return json.dumps(page)
+
+        await self.polite_wait()
+        try:
+            payload = await fetch_text(
+                url, f"website_page:{resolve_html_backend()}", _extract,
+                allowed_types=HTML_TYPES,
+                max_bytes=min(CRAWL_MAX_PAGE_BYTES, max(CRAWL_MAX_BYTES - self.bytes_used, 1))
+            )
+        except FetchError:
+            return None
+        return json.loads(payload)
+
+    def add_page(self, url: str, depth: int, page: dict):
+        base = page.get("final_url") or url
+        if depth == 0:
+            self.site = _site(base)   # the landing page may redirect (e.g. to www.)
+
+        text = page.get("text", "")
+        digest = hashlib.sha256(" ".join(text.lower().split()).encode("utf-8")).hexdigest()
+        if text and digest not in self.seen_hashes and len(self.pages) < CRAWL_MAX_PAGES:
+            self.seen_hashes.add(digest)
+            self.pages.append({"url": url, "depth": depth, "text": text})
+
+        if depth >= CRAWL_MAX_DEPTH:
+            return
+        for href, anchor_text in page.get("links", []):
+            link = normalize_url(href, base=base)
+            if not link or link in self.seen_urls or _site(link) != self.site:
+                continue
+            path = urlsplit(link).path.lower()
+            if path.endswith(SKIP_EXTENSIONS) or any(word in path for word in SKIP_PATH_WORDS):
+                continue
+            self.seen_urls.add(link)
+            if self.allowed(link):
+                self.push(link, link_score(link, anchor_text), depth + 1)
+
+    async def worker(self):
+        while not self.done():
+            if not self.frontier:
+                if self.in_flight == 0:
+                    return
+                # Wait for a page in flight to add links
+                self.wakeup.clear()
+                await self.wakeup.wait()
+                continue
+
+            _, depth, _, url = heapq.heappop(self.frontier)
+            self.in_flight += 1
+            try:
+                page = await self.fetch_page(url)
+                if page:
+                    self.add_page(url, depth, page)
+            finally:
+                self.in_flight -= 1
+                self.wakeup.set()
+
+    async def run(self) -> list:
+        await self.load_robots()
+        if self.allowed(self.start_url):
+            self.push(self.start_url, 0, 0)
+
+        workers = [asyncio.create_task(self.worker()) for _ in range(max(CRAWL_CONCURRENCY, 1))]
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*workers),
+                timeout=max(self.deadline - time.monotonic(), 0.1)
+            )
+        except asyncio.TimeoutError:
+            pass  # time budget spent: keep the pages we have
+        finally:
+            for task in workers:
+                task.cancel()
+        return self.pages
+
+
+async def crawl_website(url: str) -> list:
+    """
+    Crawl an organization's site starting at url.
+
+    Follows same-site links, most promising first (about, mission,
+    programs, impact, annual report...), within CRAWL_MAX_PAGES,
+    CRAWL_MAX_DEPTH, CRAWL_TIME_BUDGET_SECONDS and CRAWL_MAX_BYTES.
+    Honours robots.txt (including Crawl-delay), spaces out requests to the
+    host and skips pages whose text duplicates one already collected.
+    Returns [{"url", "depth", "text"}], landing page first.
+    """
+    start_url = normalize_url(url)
+    if not start_url:
+        return []
+    return await _Crawl(start_url).run()
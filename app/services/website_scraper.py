@@ -1,27 +1,28 @@
-import requests
-from bs4 import BeautifulSoup
+from app.config import WEBSITE_TEXT_TOKEN_BUDGET
+from app.services.website_crawler import crawl_website
+from app.utils.context_packer import count_tokens, truncate_to_tokens
 
 
-def scrape_website(url: str) -> str:
+def combine_pages(pages: list, budget: int = WEBSITE_TEXT_TOKEN_BUDGET) -> str:
     """
-    Deterministically extract public website text.
-    NO AI here.
+    Join crawled page texts within a token budget. Every page gets a fair
+    share; what a short page leaves unused goes to the pages after it.
     """
-    try:
-        resp = requests.get(url, timeout=10, headers={
-            "User-Agent": "Mozilla/5.0"
-        })
-        resp.raise_for_status()
-    except Exception:
-        return ""
+    parts = []
+    remaining = budget
+    for i, page in enumerate(pages):
+        share = remaining // (len(pages) - i)
+        text = truncate_to_tokens(page["text"], share)
+        remaining -= count_tokens(text)
+        parts.append(text)
+    return "\n\n".join(parts)
 
-    soup = BeautifulSoup(resp.text, "html.parser")
 
-    # Remove noise
-    for tag in soup(["script", "style", "nav", "footer", "header"]):
-        tag.decompose()
-
-    paragraphs = [p.get_text(" ", strip=True) for p in soup.find_all("p")]
-    text = " ".join(paragraphs)
+async def scrape_website(url: str) -> str:
+    """
+    Deterministically extract public website text.
+    NO AI here.
+    """
+    pages = await crawl_website(url)
 
-    return text[:12000]  # HARD LIMIT to prevent hallucination
+    return combine_pages(pages)  # HARD LIMIT to prevent hallucination
@@ -0,0 +1,179 @@
+# app/utils/context_packer.py
+import json
+from fnmatch import fnmatch
+from functools import lru_cache
+from app.config import CONTEXT_TOKEN_BUDGETS, TOKENIZER_MODEL
+
+try:
+    import tiktoken
+except ImportError:  # fall back to a chars/4 estimate
+    tiktoken = None
+
+
+# Bookkeeping fields that never help the model
+DROP_KEYS = {"created_at", "session_id", "grant_id", "grant_options", "source"}
+
+# Per task: dotted-path patterns in priority order. Paths that match no
+# pattern come last; paths matching "exclude" are dropped.
+TASK_FIELD_PRIORITIES = {
+    "readiness": {
+        "priority": [
+            "mission", "*.mission", "*mission_statement",
+            "core_purpose", "type_of_work", "goals_aspirations",
+            "website_name", "url", "scenario",
+            "organization_profile.*",
+            "website_content", "*.website_content",
+        ],
+        "exclude": [],
+    },
+    "grant_generation": {
+        "priority": ["mission_statement", "programs", "achievements", "evaluation", "budget_statement"],
+        "exclude": [],
+    },
+    "grant_analysis": {
+        "priority": [
+            "organization*.generated_output.mission_statement",
+            "organization*.generated_output.programs",
+            "organization*.generated_output.*",
+            "organization*.payload.mission",
+            "organization*.grant.*",
+            "grant_opportunity",
+        ],
+        "exclude": ["*.score", "*.payload.url"],
+    },
+    "loi": {
+        "priority": [
+            "task",
+            "grant.extracted_details.*", "grant.status", "grant.title", "grant.focus_area",
+            "organization*.generated_output.mission_statement",
+            "organization*.generated_output.programs",
+            "organization*.generated_output.*",
+            "grant.*",
+            "organization*.payload.mission",
+        ],
+        "exclude": ["*.score", "*.payload.url"],
+    },
+    "proposal": {
+        "priority": [
+            "task",
+            "grant.extracted_details.*", "grant.status", "grant.title", "grant.focus_area",
+            "organization*.generated_output.mission_statement",
+            "organization*.generated_output.programs",
+            "organization*.generated_output.*",
+            "grant.*",
+            "organization*.payload.*",
+            "organization*.gaps", "organization*.recommendations",
+        ],
+        "exclude": ["*.score", "*.payload.url"],
+    },
+}
+
+# Truncated strings shorter than this are not worth sending
+MIN_TRUNCATED_TOKENS = 32
+
+
+@lru_cache(maxsize=8)
+def _get_encoding(model: str):
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def count_tokens(text: str, model: str = TOKENIZER_MODEL) -> int:
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str = TOKENIZER_MODEL) -> str:
+    """Cut text to at most max_tokens tokens."""
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return text[:max_tokens * 4]
+
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
+
+
+def _is_empty(value) -> bool:
+    return value is None or (isinstance(value, (str, list, dict)) and len(value) == 0)
+
+
+def _flatten(value, path=()):
+    """Yield (path, leaf) pairs. Dicts are walked; lists and scalars are leaves."""
+    if isinstance(value, dict):
+        for key, child in value.items():
+            if key in DROP_KEYS:
+                continue
+            yield from _flatten(child, path + (str(key),))
+    elif not _is_empty(value):
+        yield path, value
+
+
+def _priority(dotted: str, patterns: list) -> int:
+    for i, pattern in enumerate(patterns):
+        if fnmatch(dotted, pattern):
+            return i
+    return len(patterns)
+
+
+def _dedupe_key(value) -> str:
+    text = value if isinstance(value, str) else json.dumps(value, sort_keys=True, default=str)
+    return " ".join(text.lower().split())
+
+
+def _set_path(target: dict, path: tuple, value):
+    for key in path[:-1]:
+        target = target.setdefault(key, {})
+    target[path[-1]] = value
+
+
+def pack_context(context: dict, task: str, budget: int = None) -> str:
+    """
+    Serialize context for an LLM prompt within a token budget.
+
+    Drops bookkeeping and empty fields and duplicate values, orders the
+    remaining fields by the task's priorities, and adds them until the
+    budget is spent (the last long string is truncated to fit).
+    Returns deterministic JSON (sorted keys).
+    """
+    rules = TASK_FIELD_PRIORITIES[task]
+    budget = budget if budget is not None else CONTEXT_TOKEN_BUDGETS[task]
+
+    leaves = []
+    for order, (path, value) in enumerate(_flatten(context)):
+        dotted = ".".join(path)
+        if any(fnmatch(dotted, pattern) for pattern in rules["exclude"]):
+            continue
+        leaves.append((_priority(dotted, rules["priority"]), order, path, value))
+    leaves.sort(key=lambda leaf: (leaf[0], leaf[1]))
+
+    packed = {}
+    seen = set()
+    remaining = budget
+
+    for _, _, path, value in leaves:
+        fingerprint = _dedupe_key(value)
+        if fingerprint in seen:
+            continue
+
+        text = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False, default=str)
+        cost = count_tokens(text) + len(path) + 2   # keys and punctuation
+
+        if cost > remaining:
+            if not isinstance(value, str) or remaining - len(path) - 2 < MIN_TRUNCATED_TOKENS:
+                continue
+            value = truncate_to_tokens(value, remaining - len(path) - 2)
+            cost = remaining
+
+        seen.add(fingerprint)
+        _set_path(packed, path, value)
+        remaining -= cost
+
+    return json.dumps(packed, ensure_ascii=False, sort_keys=True, default=str)
@@ -0,0 +1,23 @@
+# app/utils/deadline.py
+import time
+from contextvars import ContextVar
+
+# Absolute monotonic deadline of the current request (None = no deadline)
+_request_deadline: ContextVar = ContextVar("request_deadline", default=None)
+
+
+def set_request_deadline(seconds: float):
+    """Start a deadline `seconds` from now; returns a token for reset_request_deadline."""
+    return _request_deadline.set(time.monotonic() + seconds)
+
+
+def reset_request_deadline(token):
+    _request_deadline.reset(token)
+
+
+def remaining_time():
+    """Seconds left before the current request's deadline, or None."""
+    deadline = _request_deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
@@ -0,0 +1,63 @@
+# app/utils/file_format.py
+import io
+import zipfile
+
+SNIFF_BYTES = 8192
+
+PDF = "pdf"
+DOCX = "docx"
+DOC = "doc"          # legacy Word (OLE compound file), not supported
+ZIP = "zip"          # any other ZIP container
+HTML = "html"
+TEXT = "text"
+UNKNOWN = "unknown"
+
+_HTML_MARKERS = (b"<!doctype html", b"<html", b"<head", b"<body", b"<meta", b"<title", b"<p>", b"<div")
+
+
+def _zip_format(source) -> str:
+    try:
+        with zipfile.ZipFile(source) as archive:
+            names = set(archive.namelist())
+    except (zipfile.BadZipFile, OSError):
+        return UNKNOWN
+    return DOCX if "word/document.xml" in names else ZIP
+
+
+def _sniff(head: bytes) -> str:
+    if head.startswith(b"\xef\xbb\xbf"):
+        head = head[3:]
+    # Only a BOM or whitespace may precede the PDF header: text that merely
+    # mentions "%PDF-" must not go to the PDF parser
+    if head.lstrip().startswith(b"%PDF-"):
+        return PDF
+    if head.startswith(b"PK\x03\x04"):
+        return ZIP
+    if head.startswith(b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"):
+        return DOC
+
+    lowered = head.lstrip().lower()
+    if any(marker in lowered[:1024] for marker in _HTML_MARKERS):
+        return HTML
+    if b"\x00" in head:
+        return UNKNOWN
+    try:
+        head.decode("utf-8")
+    except UnicodeDecodeError as exc:
+        # A multi-byte character cut at the end of the sniffed window is fine
+        if exc.start < len(head) - 4:
+            return UNKNOWN
+    return TEXT
+
+
+def detect_format(data: bytes) -> str:
+    """Format of an in-memory document, from its magic bytes (ZIPs are opened to tell DOCX apart)."""
+    kind = _sniff(data[:SNIFF_BYTES])
+    return _zip_format(io.BytesIO(data)) if kind == ZIP else kind
+
+
+def detect_file_format(path: str) -> str:
+    """Format of a file on disk; reads only its first bytes (and a ZIP's central directory)."""
+    with open(path, "rb") as f:
+        kind = _sniff(f.read(SNIFF_BYTES))
+    return _zip_format(path) if kind == ZIP else kind
@@ -0,0 +1,159 @@
+# app/utils/html_extract.py
+from app.config import HTML_EXTRACTOR_BACKEND
+
+# Optional parsers; bs4 is always installed
+try:
+    from selectolax.lexbor import LexborHTMLParser as SelectolaxParser
+except ImportError:
+    SelectolaxParser = None
+
+try:
+    import lxml.html
+except ImportError:
+    lxml = None
+
+try:
+    import trafilatura
+except ImportError:  # also raised when its lxml extras are missing
+    trafilatura = None
+
+from bs4 import BeautifulSoup
+
+
+# Boilerplate removed before extraction
+NOISE_TAGS = ["script", "style", "noscript", "template", "svg", "iframe",
+              "nav", "header", "footer", "aside", "form"]
+# Blocks whose text is kept; a block inside another block is not repeated
+CONTENT_TAGS = ["p", "h1", "h2", "h3", "h4", "li", "blockquote"]
+# Main-content containers, preferred over <body> when they hold enough text
+MAIN_SELECTORS = ["main", "article", "[role=main]"]
+MIN_MAIN_CHARS = 200
+
+# "auto" picks the first installed backend in this order
+AUTO_ORDER = ["selectolax", "lxml", "bs4"]
+
+
+def _join(blocks) -> str:
+    return "\n".join(b for b in (" ".join(block.split()) for block in blocks) if b)
+
+
+# ---------- bs4 ----------
+def _extract_bs4(html: str) -> dict:
+    soup = BeautifulSoup(html, "html.parser")
+    links = [(a["href"], a.get_text(" ", strip=True)) for a in soup.find_all("a", href=True)]
+
+    for tag in soup(NOISE_TAGS):
+        tag.decompose()
+
+    root = soup.body or soup
+    for selector in MAIN_SELECTORS:
+        main = soup.select_one(selector)
+        if main is not None and len(main.get_text(strip=True)) >= MIN_MAIN_CHARS:
+            root = main
+            break
+
+    blocks = [
+        el.get_text(" ", strip=True)
+        for el in root.find_all(CONTENT_TAGS)
+        if el.find_parent(CONTENT_TAGS) is None
+    ]
+    return {"text": _join(blocks), "links": links}
+
+
+# ---------- lxml ----------
+def _lxml_links(doc) -> list:
+    return [(a.get("href"), a.text_content().strip()) for a in doc.iter("a") if a.get("href")]
+
+
+def _extract_lxml(html: str) -> dict:
+    doc = lxml.html.document_fromstring(html)
+    links = _lxml_links(doc)
+
+    for el in list(doc.iter(*NOISE_TAGS)):
+        el.drop_tree()
+
+    root = doc.find("body")
+    root = root if root is not None else doc
+    for selector in ("//main", "//article", "//*[@role='main']"):
+        found = doc.xpath(selector)
+        if found and len(found[0].text_content().strip()) >= MIN_MAIN_CHARS:
+            root = found[0]
+            break
+
+    content = set(CONTENT_TAGS)
+    blocks = [
+        el.text_content()
+        for el in root.iter(*CONTENT_TAGS)
+        if not any(parent.tag in content for parent in el.iterancestors())
+    ]
+    return {"text": _join(blocks), "links": links}
+
+
+# ---------- selectolax ----------
+def _extract_selectolax(html: str) -> dict:
+    tree = SelectolaxParser(html)
+    links = [
+        (a.attributes.get("href"), a.text(separator=" ", strip=True))
+        for a in tree.css("a[href]")
+    ]
+
+    tree.strip_tags(NOISE_TAGS)
+
+    root = tree.body or tree.root
+    for selector in MAIN_SELECTORS:
+        main = tree.css_first(selector)
+        if main is not None and len(main.text(strip=True)) >= MIN_MAIN_CHARS:
+            root = main
+            break
+
+    if root is None:
+        return {"text": "", "links": links}
+
+    content = set(CONTENT_TAGS)
+    blocks = []
+    for el in root.css(",".join(CONTENT_TAGS)):
+        parent = el.parent
+        while parent is not None and parent.tag not in content:
+            parent = parent.parent
+        if parent is None:
+            blocks.append(el.text(separator=" ", strip=True))
+    return {"text": _join(blocks), "links": links}
+
+
+# ---------- trafilatura ----------
+def _extract_trafilatura(html: str) -> dict:
+    # Best boilerplate removal, slowest; links come from a plain lxml parse
+    text = trafilatura.extract(html, include_comments=False, include_tables=True) or ""
+    return {"text": text, "links": _lxml_links(lxml.html.document_fromstring(html))}
+
+
+HTML_BACKENDS = {
+    name: fn for name, fn, available in [
+        ("selectolax", _extract_selectolax, SelectolaxParser is not None),
+        ("lxml", _extract_lxml, lxml is not None),
+        ("trafilatura", _extract_trafilatura, trafilatura is not None and lxml is not None),
+        ("bs4", _extract_bs4, True),
+    ] if available
+}
+
+
+def resolve_backend(backend: str = None) -> str:
+    backend = backend or HTML_EXTRACTOR_BACKEND
+    if backend == "auto":
+        return next(name for name in AUTO_ORDER if name in HTML_BACKENDS)
+    if backend not in HTML_BACKENDS:
+        raise ValueError(f"HTML extractor backend {backend!r} is not installed")
+    return backend
+
+
+def extract_html(html: str, backend: str = None) -> dict:
+    """
+    Main-content text of a page and its links.
+
+    Returns {"text": one block per line, "links": [(href, anchor text)]}.
+    Scripts, navigation, headers, footers and forms are dropped; text is
+    taken from <main>/<article> when present, otherwise from the body.
+    """
+    if not html or not html.strip():
+        return {"text": "", "links": []}
+    return HTML_BACKENDS[resolve_backend(backend)](html)
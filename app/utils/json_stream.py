@@ -0,0 +1,89 @@
+# app/utils/json_stream.py
+import json
+
+
+class JSONObjectStreamParser:
+    """
+    Incremental parser for a single streamed JSON object.
+
+    feed() accepts arbitrary text chunks and returns the top-level
+    (key, value) members that became complete in that chunk, so callers
+    can act on each field as soon as the model finishes writing it.
+    Text before the opening brace (e.g. a ```json fence) is ignored.
+    """
+
+    def __init__(self):
+        self.done = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._key_chars = None     # collecting a top-level key
+        self._key = None
+        self._value_chars = None   # collecting a top-level value
+
+    def _append(self, ch: str):
+        if self._key_chars is not None:
+            self._key_chars.append(ch)
+        elif self._value_chars is not None:
+            self._value_chars.append(ch)
+
+    def _finish_member(self, members: list):
+        raw = "".join(self._value_chars).strip()
+        if self._key is not None and raw:
+            members.append((self._key, json.loads(raw)))
+        self._key = None
+        self._value_chars = None
+
+    def feed(self, text: str) -> list:
+        members = []
+
+        for ch in text:
+            if self.done:
+                break
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._key_chars is not None:
+                        self._key = json.loads('"' + "".join(self._key_chars) + '"')
+                        self._key_chars = None
+                        continue
+                self._append(ch)
+                continue
+
+            if self._depth == 0:
+                if ch == "{":
+                    self._depth = 1
+                continue
+
+            if self._depth == 1 and self._value_chars is None:
+                if ch == '"' and self._key is None:
+                    self._in_string = True
+                    self._key_chars = []
+                elif ch == ":" and self._key is not None:
+                    self._value_chars = []
+                elif ch == "}":
+                    self.done = True
+                continue
+
+            if ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._finish_member(members)
+                    self.done = True
+                    continue
+            elif ch == "," and self._depth == 1:
+                self._finish_member(members)
+                continue
+
+            self._append(ch)
+
+        return members
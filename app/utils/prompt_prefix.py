@@ -0,0 +1,24 @@
+# app/utils/prompt_prefix.py
+from functools import lru_cache
+
+
+def shared_prefix(*parts: str) -> dict:
+    """
+    The static head of a prompt as one system message.
+
+    Providers cache prompt prefixes, so everything that does not depend on
+    the request (TGCI knowledge, role, task prompt) goes here, before any
+    variable content, and must be byte-identical on every call. Parts are
+    stripped and joined with blank lines; put the largest part shared by
+    several tasks (the TGCI knowledge) first.
+    """
+    return {"role": "system", "content": _join(parts)}
+
+
+@lru_cache(maxsize=64)
+def _join(parts: tuple) -> str:
+    return "\n\n".join(part.strip() for part in parts if part and part.strip())
+
+
+def knowledge_block(tgci_knowledge: str) -> str:
+    return f"TGCI KNOWLEDGE:\n{tgci_knowledge.strip()}"
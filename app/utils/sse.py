@@ -0,0 +1,29 @@
+# app/utils/sse.py
+import json
+from fastapi.responses import StreamingResponse
+
+
+def format_sse(event: str, data) -> str:
+    """Encode one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+def sse_response(events) -> StreamingResponse:
+    """
+    Wrap an async iterator of (event, data) pairs in a text/event-stream
+    response. Failures after the stream has started are sent as an
+    "error" event because the status code can no longer change, so
+    validate inputs (e.g. the session) before building the iterator.
+    """
+    async def _body():
+        try:
+            async for event, data in events:
+                yield format_sse(event, data)
+        except Exception as exc:
+            yield format_sse("error", {"detail": str(exc)})
+
+    return StreamingResponse(
+        _body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
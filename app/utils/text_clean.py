@@ -0,0 +1,15 @@
+# app/utils/text_clean.py
+import re
+
+
+def clean_text(text: str) -> str:
+    """Remove excessive line breaks, multiple spaces, non-ASCII chars"""
+    text = re.sub(r'\n+', '\n', text)
+    text = re.sub(r'\s+', ' ', text)
+    return text.strip()
+
+
+def clean_lines(text: str) -> str:
+    """Like clean_text, but keep line breaks so headings stay on their own line"""
+    lines = (re.sub(r'\s+', ' ', line).strip() for line in text.splitlines())
+    return '\n'.join(line for line in lines if line)
@@ -0,0 +1,99 @@
+# benchmarks/document_extraction.py
+"""
+Compare the PDF text engines of app/services/document_extract.py.
+
+Usage:
+    python -m benchmarks.document_extraction [corpus_dir] [--backends pypdfium2,pypdf,pdfplumber] [--repeat 1]
+
+corpus_dir defaults to app/data/tgci_sources (sample RFPs and proposals).
+Each backend runs single-threaded in a fresh process over every PDF.
+Reported per backend: pages/sec, peak memory (RSS increase), characters
+extracted, and token-level F1 against the --reference engine (pdfplumber
+by default, the engine the service used before).
+
+Format detection is also timed over every file of the corpus, to show
+that sniffing costs nothing next to a failed parse.
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from app.services.document_extract import PDF_BACKENDS, pdf_page_count, extract_pdf_pages
+from app.utils.file_format import detect_file_format, PDF
+from benchmarks.html_extraction import token_f1, _max_rss_mb
+
+
+def run_backend(backend: str, paths: list, repeat: int) -> dict:
+    """Runs in a fresh worker process so peak memory is per backend."""
+    pdf_page_count(paths[0], backend)   # warm up imports
+    rss_before = _max_rss_mb()
+
+    texts, pages = [], 0
+    start = time.perf_counter()
+    for i in range(repeat):
+        for path in paths:
+            count = pdf_page_count(path, backend)
+            text = "\n".join(extract_pdf_pages(path, 0, count, backend))
+            if i == 0:
+                texts.append(text)
+                pages += count
+    elapsed = time.perf_counter() - start
+
+    return {
+        "backend": backend,
+        "pages": pages,
+        "seconds": elapsed / repeat,
+        "peak_rss_mb": _max_rss_mb() - rss_before,
+        "texts": texts
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus_dir", nargs="?", default="app/data/tgci_sources")
+    parser.add_argument("--backends", default=",".join(PDF_BACKENDS))
+    parser.add_argument("--reference", default="pdfplumber")
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    files = [
+        os.path.join(args.corpus_dir, name) for name in sorted(os.listdir(args.corpus_dir))
+        if os.path.isfile(os.path.join(args.corpus_dir, name))
+    ]
+
+    start = time.perf_counter()
+    formats = {path: detect_file_format(path) for path in files}
+    sniff_ms = (time.perf_counter() - start) * 1000
+    paths = [path for path in files if formats[path] == PDF]
+    if not paths:
+        sys.exit(f"No PDFs in {args.corpus_dir}")
+
+    backends = [b for b in args.backends.split(",") if b]
+    missing = [b for b in backends + [args.reference] if b not in PDF_BACKENDS]
+    if missing:
+        sys.exit(f"Not installed: {', '.join(missing)} (available: {', '.join(PDF_BACKENDS)})")
+
+    ctx = multiprocessing.get_context("spawn")
+    results = {}
+    for backend in dict.fromkeys(backends + [args.reference]):
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+            results[backend] = pool.submit(run_backend, backend, paths, args.repeat).result()
+
+    references = results[args.reference]["texts"]
+    print(f"{len(files)} files sniffed in {sniff_ms:.1f} ms; {len(paths)} PDFs, "
+          f"{results[args.reference]['pages']} pages, scored against {args.reference}\n")
+    print(f"{'backend':<12} {'pages/s':>9} {'seconds':>8} {'peak MB':>8} {'chars':>9} {'F1':>6}")
+    for backend in backends:
+        result = results[backend]
+        f1 = sum(token_f1(text, ref)[2] for text, ref in zip(result["texts"], references)) / len(paths)
+        print(
+            f"{backend:<12} {result['pages'] / result['seconds']:>9.1f} {result['seconds']:>8.2f} "
+            f"{result['peak_rss_mb']:>8.1f} {sum(len(t) for t in result['texts']):>9} {f1:>6.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
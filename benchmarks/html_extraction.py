@@ -0,0 +1,140 @@
+# benchmarks/html_extraction.py
+"""
+Compare the HTML extraction backends of app/utils/html_extract.py.
+
+Usage:
+    python -m benchmarks.html_extraction [corpus_dir] [--backends selectolax,lxml,bs4] [--repeat 3]
+
+The corpus is a directory of saved pages (*.html), e.g. nonprofit and
+funder sites saved with "Save page as... (HTML only)" or curl. Without
+corpus_dir, benchmarks/html_corpus is used: small pages modelled on
+nonprofit and funder sites, each with its gold text. A page may
+have a hand-checked main-content text next to it (same name, .txt); it is
+used as the gold standard. Pages without one are scored against the
+--reference backend (trafilatura by default).
+
+Reported per backend: pages/sec, peak memory (RSS increase while
+extracting, measured in a fresh process), average characters extracted,
+and token-level precision/recall/F1 against the gold or reference text.
+"""
+import argparse
+import multiprocessing
+import os
+import re
+import resource
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from app.utils.html_extract import HTML_BACKENDS, extract_html
+
+DEFAULT_CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "html_corpus")
+
+
+def load_corpus(corpus_dir: str) -> list:
+    pages = []
+    for name in sorted(os.listdir(corpus_dir)):
+        if not name.lower().endswith((".html", ".htm")):
+            continue
+        path = os.path.join(corpus_dir, name)
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            html = f.read()
+        gold_path = os.path.splitext(path)[0] + ".txt"
+        gold = None
+        if os.path.exists(gold_path):
+            with open(gold_path, "r", encoding="utf-8", errors="replace") as f:
+                gold = f.read()
+        pages.append({"name": name, "html": html, "gold": gold})
+    return pages
+
+
+def _tokens(text: str) -> Counter:
+    return Counter(re.findall(r"\w+", text.lower()))
+
+
+def token_f1(extracted: str, reference: str) -> tuple:
+    got, want = _tokens(extracted), _tokens(reference)
+    overlap = sum((got & want).values())
+    precision = overlap / sum(got.values()) if got else 0.0
+    recall = overlap / sum(want.values()) if want else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return precision, recall, f1
+
+
+def _max_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def run_backend(backend: str, pages: list, repeat: int) -> dict:
+    """Runs in a fresh worker process so peak memory is per backend."""
+    extract_html(pages[0]["html"], backend)   # warm up imports
+    rss_before = _max_rss_mb()
+
+    texts = []
+    start = time.perf_counter()
+    for i in range(repeat):
+        for page in pages:
+            text = extract_html(page["html"], backend)["text"]
+            if i == 0:
+                texts.append(text)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "backend": backend,
+        "pages_per_sec": len(pages) * repeat / elapsed if elapsed else float("inf"),
+        "peak_rss_mb": _max_rss_mb() - rss_before,
+        "texts": texts
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus_dir", nargs="?", default=DEFAULT_CORPUS_DIR)
+    parser.add_argument("--backends", default=",".join(HTML_BACKENDS))
+    parser.add_argument("--reference", default="trafilatura")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    pages = load_corpus(args.corpus_dir)
+    if not pages:
+        sys.exit(f"No .html files in {args.corpus_dir}")
+
+    backends = [b for b in args.backends.split(",") if b]
+    # The reference backend is only needed for pages without gold text
+    reference = args.reference if any(page["gold"] is None for page in pages) else None
+    missing = [b for b in backends + [reference] if b and b not in HTML_BACKENDS]
+    if missing:
+        sys.exit(f"Not installed: {', '.join(missing)} (available: {', '.join(HTML_BACKENDS)})")
+
+    ctx = multiprocessing.get_context("spawn")
+    results = {}
+    for backend in dict.fromkeys(backends + ([reference] if reference else [])):
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+            results[backend] = pool.submit(run_backend, backend, pages, args.repeat).result()
+
+    references = [
+        page["gold"] if page["gold"] is not None else results[reference]["texts"][i]
+        for i, page in enumerate(pages)
+    ]
+    gold_count = sum(page["gold"] is not None for page in pages)
+
+    scored_against = f", others scored against {reference}" if reference else ""
+    print(f"{len(pages)} pages, {gold_count} with gold text{scored_against}\n")
+    print(f"{'backend':<12} {'pages/s':>9} {'peak MB':>8} {'avg chars':>10} {'prec':>6} {'recall':>6} {'F1':>6}")
+    for backend in backends:
+        result = results[backend]
+        scores = [token_f1(text, ref) for text, ref in zip(result["texts"], references)]
+        n = len(scores)
+        avg_chars = sum(len(text) for text in result["texts"]) / n
+        print(
+            f"{backend:<12} {result['pages_per_sec']:>9.1f} {result['peak_rss_mb']:>8.1f} {avg_chars:>10.0f} "
+            f"{sum(s[0] for s in scores) / n:>6.3f} {sum(s[1] for s in scores) / n:>6.3f} "
+            f"{sum(s[2] for s in scores) / n:>6.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
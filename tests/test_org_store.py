@@ -0,0 +1,61 @@
+# tests/test_org_store.py
+import pytest
+from app.data import org_store, session_store
+from app.data.session_store import MemorySessionStore, SQLiteSessionStore
+
+TTL = 100
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(session_store.time, "time", clock)
+    if request.param == "memory":
+        store = MemorySessionStore("org_analysis_test", max_entries=100, ttl_seconds=TTL)
+    else:
+        store = SQLiteSessionStore("org_analysis_test", 100, TTL, str(tmp_path / "sessions.sqlite3"))
+    monkeypatch.setattr(org_store, "ORG_ANALYSIS_STORE", store)
+    store.clock = clock
+    return store
+
+
+def test_child_session_outlives_parent_ttl(store):
+    org_store.save_organization_analysis("org", {"mission": "literacy"}, {"score": 1})
+
+    store.clock.now += TTL - 10
+    org_store.save_session_reference("child", "org", {"source": "UPLOADED_GRANT"}, {"grant": {"id": 1}})
+
+    # Past the parent's original TTL, still inside the child's
+    store.clock.now += 20
+    resolved = org_store.get_organization_analysis("child")
+
+    assert resolved is not None
+    assert resolved["analysis"]["grant"] == {"id": 1}
+    assert resolved["analysis"]["organization"]["payload"] == {"mission": "literacy"}
+
+
+def test_grandchild_keeps_whole_chain_alive(store):
+    org_store.save_organization_analysis("org", {"mission": "literacy"}, {"score": 1})
+    store.clock.now += TTL - 10
+    org_store.save_session_reference("child", "org", {}, {"grant": {"id": 1}})
+    store.clock.now += TTL - 10
+    org_store.save_session_reference("grandchild", "child", {}, {"loi": "draft"})
+
+    store.clock.now += 20
+    assert org_store.get_organization_analysis("grandchild") is not None
+
+
+def test_child_expires_with_its_own_ttl(store):
+    org_store.save_organization_analysis("org", {"mission": "literacy"}, {"score": 1})
+    org_store.save_session_reference("child", "org", {}, {"grant": {"id": 1}})
+
+    store.clock.now += TTL + 1
+    assert org_store.get_organization_analysis("child") is None
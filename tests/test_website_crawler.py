@@ -0,0 +1,166 @@
+# tests/test_website_crawler.py
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+import pytest
+from app.services import http_cache, http_fetch, website_crawler
+from app.services.website_crawler import crawl_website
+
+
+def page(title: str, body: str, links=()) -> str:
+    anchors = "".join(f'<a href="{href}">{text}</a>' for href, text in links)
+    return f"<html><body><main><h1>{title}</h1><p>{body}</p>{anchors}</main></body></html>"
+
+
+class Site:
+    """Pages served by path; records every request path in order."""
+
+    def __init__(self):
+        self.pages = {}
+        self.robots = None
+        self.delay = 0.0
+        self.requests = []
+
+
+@pytest.fixture
+def site(monkeypatch):
+    site = Site()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            site.requests.append(self.path)
+            if self.path == "/robots.txt" and site.robots is not None:
+                body, content_type = site.robots, "text/plain"
+            elif self.path in site.pages:
+                time.sleep(site.delay)
+                body, content_type = site.pages[self.path], "text/html; charset=utf-8"
+            else:
+                self.send_error(404)
+                return
+            data = body.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    site.url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    # Every crawl starts cold, unthrottled and on this test's event loop
+    monkeypatch.setattr(http_cache, "HTTP_CACHE_ENABLED", False)
+    monkeypatch.setattr(http_fetch, "_host_semaphores", {})
+    monkeypatch.setattr(website_crawler, "CRAWL_HOST_DELAY_SECONDS", 0.0)
+    monkeypatch.setattr(website_crawler, "CRAWL_CONCURRENCY", 1)
+    monkeypatch.setattr(website_crawler, "CRAWL_MAX_PAGES", 10)
+    monkeypatch.setattr(website_crawler, "CRAWL_MAX_DEPTH", 2)
+    monkeypatch.setattr(website_crawler, "CRAWL_MAX_BYTES", 1024 * 1024)
+    monkeypatch.setattr(website_crawler, "CRAWL_TIME_BUDGET_SECONDS", 10.0)
+
+    yield site
+
+    server.shutdown()
+    server.server_close()
+
+
+def crawl(url: str) -> list:
+    async def _run():
+        try:
+            return await crawl_website(url)
+        finally:
+            await http_fetch.close_http_client()
+
+    return asyncio.run(_run())
+
+
+def paths(pages: list) -> list:
+    return [urlsplit(p["url"]).path for p in pages]
+
+
+def test_robots_disallowed_pages_are_never_requested(site):
+    site.robots = "User-agent: *\nDisallow: /private\n"
+    site.pages["/"] = page("Home", "Adult literacy in Springfield.", [("/private/about", "About"), ("/programs", "Programs")])
+    site.pages["/private/about"] = page("About", "Internal notes.")
+    site.pages["/programs"] = page("Programs", "Evening reading classes for adults.")
+
+    pages = crawl(site.url + "/")
+
+    assert paths(pages) == ["/", "/programs"]
+    assert "/private/about" not in site.requests
+
+
+def test_duplicate_content_is_kept_once(site):
+    site.pages["/"] = page("Home", "Adult literacy in Springfield.", [("/about", "About"), ("/about-us", "About us")])
+    site.pages["/about"] = page("About", "Founded in 1990 by volunteers.")
+    site.pages["/about-us"] = page("About", "Founded  in 1990 by VOLUNTEERS.")
+
+    pages = crawl(site.url + "/")
+
+    assert {"/about", "/about-us"} <= set(site.requests)
+    assert len(pages) == 2
+    assert paths(pages)[0] == "/"
+
+
+def test_frontier_fetches_promising_links_first(site, monkeypatch):
+    monkeypatch.setattr(website_crawler, "CRAWL_MAX_PAGES", 2)
+    site.pages["/"] = page("Home", "Adult literacy in Springfield.", [
+        ("/blog", "Blog"), ("/events", "Events"), ("/mission", "Our mission")
+    ])
+    for path in ("/blog", "/events", "/mission"):
+        site.pages[path] = page(path, f"Content of {path}.")
+
+    pages = crawl(site.url + "/")
+
+    assert paths(pages) == ["/", "/mission"]
+    assert site.requests[-1] == "/mission"
+
+
+def test_page_budget(site, monkeypatch):
+    monkeypatch.setattr(website_crawler, "CRAWL_MAX_PAGES", 3)
+    links = [(f"/programs/{i}", f"Program {i}") for i in range(10)]
+    site.pages["/"] = page("Home", "Adult literacy in Springfield.", links)
+    for href, text in links:
+        site.pages[href] = page(text, f"Details of {text}.")
+
+    pages = crawl(site.url + "/")
+
+    assert len(pages) == 3
+    assert len([p for p in site.requests if p.startswith("/programs/")]) == 2
+
+
+def test_byte_budget(site, monkeypatch):
+    filler = "reading " * 500
+    links = [(f"/programs/{i}", f"Program {i}") for i in range(10)]
+    site.pages["/"] = page("Home", "Adult literacy in Springfield.", links)
+    for i, (href, text) in enumerate(links):
+        site.pages[href] = page(text, f"Program {i}. {filler}")
+    landing = len(site.pages["/"].encode("utf-8"))
+    each = len(site.pages["/programs/0"].encode("utf-8"))
+    monkeypatch.setattr(website_crawler, "CRAWL_MAX_BYTES", landing + 2 * each)
+
+    pages = crawl(site.url + "/")
+
+    assert len(pages) == 3
+    assert len([p for p in site.requests if p.startswith("/programs/")]) == 2
+
+
+def test_time_budget(site, monkeypatch):
+    monkeypatch.setattr(website_crawler, "CRAWL_TIME_BUDGET_SECONDS", 1.0)
+    links = [(f"/programs/{i}", f"Program {i}") for i in range(10)]
+    site.pages["/"] = page("Home", "Adult literacy in Springfield.", links)
+    for href, text in links:
+        site.pages[href] = page(text, f"Details of {text}.")
+    site.delay = 0.3
+
+    started = time.monotonic()
+    pages = crawl(site.url + "/")
+
+    assert time.monotonic() - started < 2.0
+    assert 1 <= len(pages) < 1 + len(links)